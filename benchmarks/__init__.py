@@ -0,0 +1,7 @@
+"""
+Benchmarks del proceso de fichas → banco con datos sintéticos.
+
+    python -m benchmarks correr --escalas 100 1000 10000
+    python -m benchmarks comparar benchmarks/baseline.json nuevo.json
+    python -m benchmarks verificar
+"""
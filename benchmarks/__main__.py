@@ -0,0 +1,39 @@
+import argparse
+import sys
+
+from benchmarks.regresion import verificar
+from benchmarks.suite import comparar, correr
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_correr = sub.add_parser("correr", help="mide cada etapa y guarda un JSON")
+    p_correr.add_argument("--escalas", type=int, nargs="+", default=[100, 1000, 10000])
+    p_correr.add_argument("--repeticiones", type=int, default=3)
+    p_correr.add_argument("--semilla", type=int, default=1)
+    p_correr.add_argument("--salida", default="benchmarks/baseline.json")
+    p_correr.add_argument("--procesos", type=int, default=None, help="para parseo_procesos (por defecto, núcleos)")
+
+    p_comparar = sub.add_parser("comparar", help="marca regresiones frente a un baseline")
+    p_comparar.add_argument("base")
+    p_comparar.add_argument("nuevo")
+    p_comparar.add_argument("--tolerancia", type=float, default=0.15)
+    p_comparar.add_argument("--minimo", type=float, default=0.01)
+
+    sub.add_parser("verificar", help="compara la Sheet1 publicada con la de la versión original")
+
+    args = parser.parse_args()
+
+    if args.comando == "correr":
+        correr(args.escalas, args.salida, args.repeticiones, args.semilla, args.procesos)
+    elif args.comando == "verificar":
+        sys.exit(1 if verificar() else 0)
+    else:
+        regresiones = comparar(args.base, args.nuevo, args.tolerancia, args.minimo)
+        sys.exit(1 if regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
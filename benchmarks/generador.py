@@ -0,0 +1,157 @@
+import io
+import random
+
+import pandas as pd
+from openpyxl import Workbook
+
+from components.banco_drive import cargar_banco_drive
+from components.esquema_banco import aplicar_esquema
+from components.modelo_atencion import cargar_reglas
+
+# ----------------------------
+# DATOS DE EJEMPLO
+# ----------------------------
+# Los primeros códigos son los del modelo de atención, para que
+# generar_resumen_modelo_atencion tenga con qué trabajar.
+CODIGOS_MODELO = cargar_reglas()["codigo"].tolist()
+
+PREFIJOS = ["CAL", "SP", "GDR", "CTT", "PYP", "AUT", "RYC"]
+AREAS = ["Calidad", "Salud Pública", "Gestión del Riesgo", "Contratación", "Promoción y Prevención"]
+JERARQUIAS = ["Estratégico", "Táctico", "Operativo"]
+TIPOS = ["Resultado", "Proceso", "Estructura"]
+PERIODICIDADES = ["Mensual", "Trimestral", "Semestral", "Anual", "mensual "]
+ESTADOS = ["Activo", "ACTIVO", "Activo ", "Inactivo", "En revisión"]
+MESES = "BCDEFGHIJKLM"
+
+
+def codigo_ficha(i):
+    if i < len(CODIGOS_MODELO):
+        return CODIGOS_MODELO[i]
+    return f"IND-{PREFIJOS[i % len(PREFIJOS)]}-{i:04d}"
+
+
+# ----------------------------
+# VALORES MENSUALES
+# ----------------------------
+def _valor_mes(azar, porcentaje):
+    """
+    Mezcla lo que llega en las fichas reales: decimales de Excel con
+    formato %, textos "85%" / "45,5%", conteos, vacíos, N/A y errores.
+    """
+    sorteo = azar.random()
+    if sorteo < 0.10:
+        return azar.choice([None, "", "N/A", "#DIV/0!"])
+
+    if porcentaje:
+        valor = azar.uniform(0.3, 1.0)
+        if sorteo < 0.25:
+            return f"{valor * 100:.1f}%".replace(".", ",")
+        return round(valor, 4)
+
+    return azar.choice([azar.randint(0, 40), round(azar.uniform(1, 60), 3)])
+
+
+# ----------------------------
+# FICHA SINTÉTICA
+# ----------------------------
+def generar_ficha(i, azar):
+    """
+    Ficha con el layout que espera extraer_ficha: código en L5 (o M5),
+    metadatos en C5–M13, meses en B19–M19, valor anual en N19 y hoja
+    de evaluación (A2–E2).
+
+    Retorna (nombre de archivo, bytes del xlsx).
+    """
+
+    # ~5% repite un código anterior (la última ficha gana)
+    if i > 50 and azar.random() < 0.05:
+        codigo = codigo_ficha(azar.randrange(i))
+    else:
+        codigo = codigo_ficha(i)
+
+    wb = Workbook()
+    wb.active.title = "Instructivo"
+    wb.active["A1"] = "Diligenciar la hoja del indicador"
+
+    ws = wb.create_sheet(codigo)
+
+    sorteo = azar.random()
+    if sorteo < 0.02:
+        ws["L5"] = "SIN CÓDIGO"
+    elif sorteo < 0.15:
+        ws["M5"] = f" {codigo.lower()} "
+    else:
+        ws["L5"] = codigo
+
+    ws["C5"] = f"Indicador sintético {i}"
+    ws["I5"] = azar.choice(JERARQUIAS)
+    ws["C6"] = "Medir el cumplimiento del proceso"
+    ws["C7"] = azar.choice(AREAS)
+    ws["H7"] = f"Proceso {i % 12}"
+    ws["C8"] = azar.choice(TIPOS)
+    ws["L8"] = azar.choice(["Ascendente", "Descendente"])
+    ws["C9"] = "Numerador"
+    ws["H9"] = "Denominador"
+    ws["L9"] = "Resolución 256 de 2016"
+    ws["C10"] = "Sistema de información"
+    ws["H10"] = "Base de datos"
+    ws["C11"] = azar.choice(PERIODICIDADES)
+    ws["C12"] = azar.choice(PERIODICIDADES)
+    ws["C13"] = azar.choice([None, "Sin observaciones"])
+
+    porcentaje = azar.random() < 0.6
+    if porcentaje:
+        ws["K11"], ws["L11"], ws["M11"] = azar.choice([(0.5, 0.8, 0.9), ("50%", "80%", "90%"), (50, 80, "N/A")])
+    else:
+        ws["K11"], ws["L11"], ws["M11"] = azar.choice([(5, 10, 15), ("5", "10", None)])
+
+    for columna in MESES:
+        ws[f"{columna}19"] = _valor_mes(azar, porcentaje)
+    ws["N19"] = _valor_mes(azar, porcentaje)
+    ws["O19"] = azar.choice(["Cumple", "No cumple", None])
+    ws["P19"] = azar.choice(["Satisfactorio", "Aceptable", "Crítico"])
+
+    if azar.random() < 0.9:
+        ev = wb.create_sheet("Evaluación")
+        ev.append(["ESTADO", "ORIGEN", "DOCUMENTADO", "DE SEG CONTRACTUAL", "REVISADOS"])
+        ev.append([azar.choice(ESTADOS), "Interno", "Si", azar.choice(["Si", "No"]), "Si"])
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return f"Ficha {codigo}.xlsx", buffer.getvalue()
+
+
+def generar_fichas(n, semilla=1):
+    azar = random.Random(semilla)
+    return [generar_ficha(i, azar) for i in range(n)]
+
+
+# ----------------------------
+# BANCO PREVIO
+# ----------------------------
+def generar_banco(n, semilla=1):
+    """
+    Banco con la mitad de los códigos de generar_fichas(n): la otra
+    mitad entra como indicadores nuevos.
+    """
+
+    azar = random.Random(semilla)
+    banco, _ = cargar_banco_drive(
+        get_file_id_by_name=lambda folder_id, filename: None,
+        read_excel_from_drive=None
+    )
+
+    filas = [
+        {
+            "CONSE": codigo_ficha(i),
+            "ÁREA": azar.choice(AREAS),
+            "ESTADO DEL INDICADOR": azar.choice(ESTADOS),
+            "PERIODICIDAD MEDICION": azar.choice(PERIODICIDADES),
+        }
+        for i in range(0, n, 2)
+    ]
+
+    banco = pd.concat([banco, pd.DataFrame(filas)], ignore_index=True).astype(object).fillna("").astype(str)
+
+    # Como cargar_banco_drive: tipos del esquema
+    return aplicar_esquema(banco)
@@ -0,0 +1,169 @@
+import contextlib
+import io
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+from components.banco_drive import clean_str, norm_code
+from components.guardar_banco_drive import guardar_banco_con_estilos_drive
+from components.procesar_fichas import procesar_fichas_drive
+
+# ----------------------------
+# SALIDA PUBLICADA FRENTE A LA ORIGINAL
+# ----------------------------
+# Casos chicos cuya Sheet1 y Resumen_Estado se comparan celda por celda con
+# lo que escribía la versión original del proceso (valores fijados en
+# ESPERADO y ESPERADO_ESTADO). Cubren lo que más fácil se corre al
+# cambiar el modelo de datos: conteos de 1 (la heurística 0 < x <= 1
+# los vuelve %), meses vacíos, filas del banco que no vienen de ninguna
+# ficha y estados escritos de distintas formas ("Activo", "ACTIVO",
+# "Activo ": Resumen_Estado los cuenta por separado).
+
+COLUMNAS_BANCO = [
+    "ÁREA", "CONSE", "INDICADOR", "ESTADO DEL INDICADOR", "PROCESO",
+    "OBJETIVO-DESCRIPCIÓN", "ORIGEN", "FÓRMULA", "FUENTE NUMERADOR",
+    "FUENTE DENOMINADOR", "JERARQUÍA", "NORMA RELACIONADA",
+    "TIPO DE INDICADOR", "TENDENCIA", "PERIODICIDAD MEDICION",
+    "PERIODICIDAD ANÁLISIS", "OBSERVACIONES",
+    "Critico", "Aceptable", "Satisfactorio",
+    "DOCUMENTADO", "DE SEG CONTRACTUAL", "REVISADOS",
+    "ene-25", "feb-25", "mar-25", "abr-25", "may-25", "jun-25",
+    "jul-25", "ago-25", "sept-25", "oct-25", "nov-25", "dic-25",
+    "VALOR ANUAL", "VALORACIÓN"
+]
+
+MESES = COLUMNAS_BANCO[23:35]
+
+# código → (meses B19–M19, valor anual N19)
+FICHAS = {
+    # Un conteo de 1 a mitad de año: desde ahí todo sale como %
+    "IND-REG-001": ([12, 1, 0.85, None, 3.456, "45,5%", 0, "", "N/A", 5, "#DIV/0!", 7], 15.2),
+    # Solo conteos
+    "IND-REG-002": ([3, 10, None, 2.5, 40, None, None, None, None, None, None, None], 55),
+}
+
+# Filas del banco de Drive (texto, como lo lee cargar_banco_drive):
+# código → (estado, meses)
+BANCO = {
+    "IND-REG-001": ("ACTIVO", ["5", "", "", "", "", "", "", "", "", "", "", ""]),
+    # Sin ficha y a medio llenar: se publica tal como está
+    "IND-REG-003": ("Activo ", ["12", "", "85.00%", "N/A", "45.5", "", "", "", "", "", "", ""]),
+    "IND-REG-004": ("Activo", [""] * 12),
+    "IND-REG-005": ("Inactivo", [""] * 12),
+}
+
+ESPERADO = {
+    "IND-REG-001": [
+        12, "100.00%", "85.00%", "N/A", "3.46%", "45.50%",
+        "0.00%", "N/A", "N/A", "5.00%", "N/A", "7.00%", "15%",
+    ],
+    "IND-REG-002": [
+        3, 10, "N/A", 2.5, 40, "N/A",
+        "N/A", "N/A", "N/A", "N/A", "N/A", "N/A", 55,
+    ],
+    "IND-REG-003": [
+        "12", None, "85.00%", "N/A", "45.5", None,
+        None, None, None, None, None, None, None,
+    ],
+}
+
+# Resumen_Estado: (estado, CONSE, TOTAL)
+ESPERADO_ESTADO = [
+    ("ESTADO DEL INDICADOR", "CONSE", "TOTAL"),
+    ("ACTIVO", 1, 1),
+    ("Activo", 1, 1),
+    ("Activo ", 1, 1),
+    ("TOTAL GENERAL", 3, 3),
+]
+
+
+def _ficha(codigo, meses, anual):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = codigo
+
+    ws["L5"] = codigo
+    ws["C5"] = f"Indicador {codigo}"
+    ws["C7"] = "Calidad"
+    ws["C11"] = "Mensual"
+    for columna, valor in zip("BCDEFGHIJKLM", meses):
+        ws[f"{columna}19"] = valor
+    ws["N19"] = anual
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def _banco():
+    filas = [
+        {**{c: "" for c in COLUMNAS_BANCO}, "CONSE": codigo, "ÁREA": "Calidad",
+         "ESTADO DEL INDICADOR": estado, **dict(zip(MESES, meses))}
+        for codigo, (estado, meses) in BANCO.items()
+    ]
+    return pd.DataFrame(filas, columns=COLUMNAS_BANCO, dtype=str)
+
+
+def libro_banco():
+    """
+    Libro del banco publicado para los casos (openpyxl, solo lectura).
+    """
+    datos = {f"id-{codigo}": _ficha(codigo, *valores) for codigo, valores in FICHAS.items()}
+    files = [{"id": file_id, "name": f"Ficha {file_id[3:]}.xlsx"} for file_id in datos]
+    salida = {}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        banco, _ = procesar_fichas_drive(
+            files_anio=files,
+            banco=_banco(),
+            col_codigo="CONSE",
+            read_excel_from_drive=lambda file_id, **kwargs: io.BytesIO(datos[file_id]),
+            clean_str=clean_str,
+            norm_code=norm_code
+        )
+        guardar_banco_con_estilos_drive(
+            banco=banco,
+            create_or_update_file=lambda bytes_data, **kwargs: salida.update(xlsx=bytes_data),
+            banco_file_id=None,
+            banco_folder_id=None
+        )
+
+    return load_workbook(io.BytesIO(salida["xlsx"]), read_only=True)
+
+
+def hoja_banco(wb):
+    """
+    Sheet1: código → meses + VALOR ANUAL.
+    """
+    filas = wb["Sheet1"].iter_rows(values_only=True)
+    encabezado = [str(c).upper() for c in next(filas)]
+    columnas = [encabezado.index(c.upper()) for c in MESES + ["VALOR ANUAL"]]
+    codigo = encabezado.index("CONSE")
+
+    return {fila[codigo]: [fila[i] for i in columnas] for fila in filas}
+
+
+def verificar():
+    """
+    Compara la salida con ESPERADO. Retorna las diferencias
+    (código, columna, esperado, obtenido).
+    """
+    wb = libro_banco()
+    obtenido = hoja_banco(wb)
+    diferencias = []
+
+    for codigo, esperado in ESPERADO.items():
+        fila = obtenido.get(codigo) or [None] * len(esperado)
+        for columna, e, o in zip(MESES + ["VALOR ANUAL"], esperado, fila):
+            if e != o or type(e) is not type(o):
+                diferencias.append((codigo, columna, e, o))
+
+    estado = [tuple(f) for f in wb["Resumen_Estado"].iter_rows(values_only=True)]
+    if estado != ESPERADO_ESTADO:
+        diferencias.append(("Resumen_Estado", None, ESPERADO_ESTADO, estado))
+
+    for codigo, columna, e, o in diferencias:
+        print(f"❌ {codigo} {columna or ''}: esperado {e!r}, obtenido {o!r}")
+
+    print("✅ Sheet1 y Resumen_Estado iguales a la original" if not diferencias else f"\n❌ {len(diferencias)} diferencias")
+    return diferencias
@@ -0,0 +1,203 @@
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import time
+from datetime import datetime
+
+import openpyxl
+import pandas as pd
+
+from benchmarks.generador import generar_banco, generar_fichas
+from components.banco_drive import clean_str, norm_code
+from components.guardar_banco_drive import guardar_banco_con_estilos_drive
+from components.esquema_banco import aplicar_esquema
+from components.modelo_atencion import generar_resumen_modelo_atencion
+from components.normalizacion import COLUMNAS_TEXTO_LIBRE, normalizar
+from components.procesar_fichas import aplicar_filas_banco, extraer_fichas, parsear_ficha
+from components.resumen import generar_resumenes
+
+COL_CODIGO = "CONSE"
+ETAPAS = ("parseo", "parseo_procesos", "upsert", "normalizacion", "resumenes", "modelo", "render")
+
+
+# ----------------------------
+# ETAPAS
+# ----------------------------
+def _parsear(fichas):
+    filas = []
+    for filename, datos in fichas:
+        _, codigo, fila = parsear_ficha(datos, filename, COL_CODIGO, clean_str, norm_code)
+        if codigo:
+            filas.append(fila)
+    return filas
+
+
+def _parsear_procesos(fichas, procesos):
+    descargas = (({"name": filename}, io.BytesIO(datos), None) for filename, datos in fichas)
+    return [
+        fila
+        for _, (_, codigo, fila), _ in extraer_fichas(
+            descargas, COL_CODIGO, clean_str, norm_code, procesos=procesos, total=len(fichas)
+        )
+        if codigo
+    ]
+
+
+def _upsert(banco, filas):
+    banco = banco.copy()
+    banco["RANGO DE GESTION"] = None
+    columnas = set(banco.columns)
+    filas = [{k: v for k, v in f.items() if k in columnas} for f in filas]
+    return aplicar_esquema(aplicar_filas_banco(banco, filas, COL_CODIGO))
+
+
+def _normalizar(banco):
+    # Carga (códigos y texto libre) + limpieza de fórmulas tras el cruce manual
+    banco, _ = normalizar(
+        banco.copy(),
+        codigos=[COL_CODIGO],
+        vacios=COLUMNAS_TEXTO_LIBRE,
+        formulas=list(banco.columns)
+    )
+    return banco
+
+
+def _mayusculas(banco):
+    banco = banco.copy()
+    banco.columns = banco.columns.str.strip().str.upper()
+    return banco
+
+
+def _render(banco):
+    salida = {}
+
+    def guardar(bytes_data, **kwargs):
+        salida["bytes"] = len(bytes_data)
+
+    guardar_banco_con_estilos_drive(
+        banco=banco.copy(),
+        create_or_update_file=guardar,
+        banco_file_id=None,
+        banco_folder_id=None
+    )
+    return salida["bytes"]
+
+
+def _medir(fn, repeticiones):
+    """
+    Ejecuta `fn` `repeticiones` veces (sin su salida por consola).
+    Retorna (mínimo y mediana en segundos, último resultado).
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            resultado = fn()
+            tiempos.append(time.perf_counter() - inicio)
+
+    return {"min": round(min(tiempos), 4), "mediana": round(statistics.median(tiempos), 4)}, resultado
+
+
+def correr_escala(n, repeticiones=3, semilla=1, procesos=None):
+    print(f"\n🧪 {n} fichas")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        fichas = generar_fichas(n, semilla)
+        banco = generar_banco(n, semilla)
+
+    tiempos = {}
+
+    tiempos["parseo"], filas = _medir(lambda: _parsear(fichas), repeticiones)
+    tiempos["parseo_procesos"], _ = _medir(
+        lambda: _parsear_procesos(fichas, procesos or os.cpu_count() or 1), repeticiones
+    )
+    tiempos["upsert"], banco = _medir(lambda: _upsert(banco, filas), repeticiones)
+    tiempos["normalizacion"], _ = _medir(lambda: _normalizar(banco), repeticiones)
+
+    banco_mayus = _mayusculas(banco)
+    tiempos["resumenes"], _ = _medir(lambda: generar_resumenes(banco_mayus.copy()), repeticiones)
+    tiempos["modelo"], _ = _medir(lambda: generar_resumen_modelo_atencion(banco_mayus.copy()), repeticiones)
+    # Incluye resúmenes y modelo, como en la ejecución real
+    tiempos["render"], bytes_xlsx = _medir(lambda: _render(banco), repeticiones)
+
+    for etapa in ETAPAS:
+        print(f"   {etapa:<16} {tiempos[etapa]['min']:>9.3f}s")
+
+    return {
+        "fichas": n,
+        "filas_banco": len(banco),
+        "bytes_xlsx": bytes_xlsx,
+        "tiempos": tiempos,
+    }
+
+
+# ----------------------------
+# CORRER / COMPARAR
+# ----------------------------
+def correr(escalas, salida, repeticiones=3, semilla=1, procesos=None):
+    resultado = {
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "openpyxl": openpyxl.__version__,
+            "plataforma": platform.platform(),
+            "repeticiones": repeticiones,
+            "semilla": semilla,
+            "procesos": procesos or os.cpu_count(),
+        },
+        "escalas": {str(n): correr_escala(n, repeticiones, semilla, procesos) for n in escalas},
+    }
+
+    carpeta = os.path.dirname(salida)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as fh:
+        json.dump(resultado, fh, indent=2, ensure_ascii=False)
+
+    print(f"\n💾 Resultados guardados en {salida}")
+    return resultado
+
+
+def comparar(ruta_base, ruta_nueva, tolerancia=0.15, minimo=0.01):
+    """
+    Compara el mínimo de cada etapa. Es regresión si el tiempo nuevo
+    supera al base en más de `tolerancia` (y la diferencia pasa de
+    `minimo` segundos, para no marcar ruido).
+
+    Retorna la lista de regresiones (escala, etapa, base, nuevo).
+    """
+
+    with open(ruta_base, encoding="utf-8") as fh:
+        base = json.load(fh)["escalas"]
+    with open(ruta_nueva, encoding="utf-8") as fh:
+        nueva = json.load(fh)["escalas"]
+
+    regresiones = []
+    print(f"{'escala':>7} {'etapa':<16} {'base':>9} {'nuevo':>9} {'cambio':>8}")
+
+    for escala in sorted(set(base) & set(nueva), key=int):
+        for etapa in ETAPAS:
+            t_base = base[escala]["tiempos"].get(etapa, {}).get("min")
+            t_nuevo = nueva[escala]["tiempos"].get(etapa, {}).get("min")
+            if t_base is None or t_nuevo is None:
+                continue
+
+            cambio = (t_nuevo - t_base) / t_base if t_base else 0.0
+            regresion = cambio > tolerancia and t_nuevo - t_base > minimo
+            marca = "⚠ regresión" if regresion else ("🚀" if cambio < -tolerancia else "")
+
+            print(f"{escala:>7} {etapa:<16} {t_base:>8.3f}s {t_nuevo:>8.3f}s {cambio:>+7.0%} {marca}")
+
+            if regresion:
+                regresiones.append((escala, etapa, t_base, t_nuevo))
+
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresiones (tolerancia {tolerancia:.0%})")
+    else:
+        print("\n✅ Sin regresiones")
+
+    return regresiones
@@ -0,0 +1,48 @@
+import importlib
+import os
+
+# ----------------------------
+# BACKENDS DE ARCHIVOS
+# ----------------------------
+# Módulos intercambiables con las mismas funciones (y firmas) que
+# drive_reader. Se elige con DRIVE_BACKEND ("drive" por defecto).
+BACKENDS = {
+    "drive": "drive_reader",
+    "local": "components.drive_local",
+}
+
+FUNCIONES_BACKEND = (
+    "precalentar",
+    "reset_metadata_cache",
+    "prefetch_metadata",
+    "shortcut_targets",
+    "list_files_in_folder",
+    "list_folder_cached",
+    "list_files_in_folders",
+    "get_file_metadata",
+    "read_excel_from_drive",
+    "get_file_id_by_name",
+    "create_or_update_file",
+    "get_start_page_token",
+    "list_changes",
+)
+
+
+def cargar_backend(nombre=None):
+    """
+    Importa el backend pedido y valida que exponga todas las funciones
+    que usa el proceso.
+    """
+
+    nombre = nombre or os.getenv("DRIVE_BACKEND", "drive")
+    if nombre not in BACKENDS:
+        raise ValueError(f"❌ Backend desconocido: {nombre} (opciones: {', '.join(BACKENDS)})")
+
+    modulo = importlib.import_module(BACKENDS[nombre])
+
+    faltantes = [f for f in FUNCIONES_BACKEND if not callable(getattr(modulo, f, None))]
+    if faltantes:
+        raise TypeError(f"❌ El backend '{nombre}' no implementa: {', '.join(faltantes)}")
+
+    print(f"🔌 Backend de archivos: {nombre}")
+    return modulo
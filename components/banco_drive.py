@@ -1,6 +1,11 @@
+import hashlib
+
 import pandas as pd
 from openpyxl.utils import get_column_letter
 
+from components.esquema_banco import aplicar_esquema
+from components.normalizacion import COLUMNAS_TEXTO_LIBRE, normalizar
+
 # --------------------------------
 # GOOGLE DRIVE (IDS)
 # --------------------------------
@@ -25,6 +30,19 @@ def norm_code(x):
     return str(x).strip().upper().replace(" ", "")
 
 
+def md5_stream(stream):
+    """
+    md5 del contenido de un stream, leído por bloques (la descarga
+    puede estar en disco).
+    """
+    md5 = hashlib.md5()
+    stream.seek(0)
+    for bloque in iter(lambda: stream.read(1024 * 1024), b""):
+        md5.update(bloque)
+    stream.seek(0)
+    return md5.hexdigest()
+
+
 def construir_formula_excel(row_idx, col_valor, formula_base):
 
     if formula_base is None:
@@ -51,8 +69,18 @@ def construir_formula_excel(row_idx, col_valor, formula_base):
 # ----------------------------
 def cargar_banco_drive(
     get_file_id_by_name,
-    read_excel_from_drive
+    read_excel_from_drive,
+    incidencias=None,
+    get_file_metadata=None,
+    snapshot=None
 ):
+    """
+    Carga el banco y le aplica el esquema (esquema_banco). Los problemas
+    de validación se agregan a `incidencias` si se pasa una lista.
+
+    Con `snapshot` (SnapshotBanco) y `get_file_metadata`, si el xlsx de
+    Drive tiene el mismo md5 que el snapshot local no se descarga.
+    """
 
     BANCO_FILENAME = "Banco_Indicadores_BASE.xlsx"
 
@@ -74,13 +102,32 @@ def cargar_banco_drive(
     ]
 
     if BANCO_FILE_ID:
-        banco_stream = read_excel_from_drive(BANCO_FILE_ID)
-        banco = pd.read_excel(banco_stream, dtype=str, keep_default_na=False)
+        md5 = None
+        if snapshot and get_file_metadata:
+            md5 = get_file_metadata(BANCO_FILE_ID).get("md5Checksum")
+
+        banco = snapshot.cargar(md5) if snapshot else None
+
+        if banco is not None:
+            print("⚡ Banco cargado desde el snapshot local (sin cambios en Drive)")
+        else:
+            banco_stream = read_excel_from_drive(BANCO_FILE_ID)
+            banco = pd.read_excel(banco_stream, dtype=str, keep_default_na=False)
+            if snapshot:
+                # md5 de lo descargado: la marca corresponde a este contenido
+                snapshot.guardar(md5_stream(banco_stream), banco)
     else:
         banco = pd.DataFrame(columns=columnas_banco)
         BANCO_FILE_ID = None
 
-    banco["CONSE"] = banco["CONSE"].apply(norm_code)
+    banco, _ = normalizar(
+        banco,
+        codigos=["CONSE"],
+        vacios=COLUMNAS_TEXTO_LIBRE,
+        nombre="banco"
+    )
+
+    banco = aplicar_esquema(banco, incidencias, origen=BANCO_FILENAME)
 
     return banco, BANCO_FILE_ID
 
@@ -95,7 +142,7 @@ def cargar_datos_manuales(read_excel_from_drive):
     stream = read_excel_from_drive(MANUAL_FILE_ID)
     df = pd.read_excel(stream, dtype=str, keep_default_na=False)
 
-    df["Cod. Indicador"] = df["Cod. Indicador"].apply(norm_code)
+    df, _ = normalizar(df, codigos=["Cod. Indicador"], nombre="manual")
 
     columnas = {
         "Cod. Indicador": "CONSE",
@@ -163,10 +210,9 @@ def unir_datos_manuales(banco, manual_df):
     for col in columnas_simple:
         col_m = f"{col}_MANUAL"
         if col_m in banco.columns:
-            banco[col] = banco[col_m].where(banco[col_m] != "", banco[col])
+            # object: el valor manual puede no estar entre las categorías
+            banco[col] = banco[col_m].where(banco[col_m] != "", banco[col].astype(object))
             banco.drop(columns=[col_m], inplace=True)
 
-
-
-
-    return banco
+    # Vuelve a tipar las columnas que reemplazó el archivo manual
+    return aplicar_esquema(banco)
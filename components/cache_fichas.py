@@ -0,0 +1,106 @@
+import json
+import os
+import time
+
+
+# ----------------------------
+# CACHE LOCAL DE EXTRACCIÓN
+# ----------------------------
+class CacheFichas:
+    """
+    Cache en disco de fichas ya extraídas.
+
+    Cada entrada se guarda por file_id junto con el checksum de Drive
+    (md5Checksum o, para Google Sheets, modifiedTime) y el nombre del
+    archivo (la hoja que se extrae depende de él). Si el checksum o el
+    nombre cambian, o la versión de extracción es otra, la entrada no
+    se usa.
+    """
+
+    def __init__(self, ruta, version, max_entradas=5000, max_dias=90):
+        self.ruta = ruta
+        self.version = version
+        self.max_entradas = max_entradas
+        self.max_dias = max_dias
+        self.hits = 0
+        self.misses = 0
+        self.entradas = self._leer()
+
+    def _leer(self):
+        if not os.path.exists(self.ruta):
+            return {}
+
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            print("⚠ Cache de fichas ilegible, se reconstruye")
+            return {}
+
+        # Lógica de extracción distinta → cache inválida
+        if data.get("version") != self.version:
+            print("♻ Versión de extracción cambió, se invalida la cache")
+            return {}
+
+        return data.get("entradas", {})
+
+    @staticmethod
+    def clave(ficha):
+        # Un acceso directo no cambia cuando cambia su destino: no se cachea
+        if ficha.get("mimeType") == "application/vnd.google-apps.shortcut":
+            return None
+        return ficha.get("md5Checksum") or ficha.get("modifiedTime")
+
+    def obtener(self, ficha):
+        clave = self.clave(ficha)
+        entrada = self.entradas.get(ficha["id"])
+
+        if (
+            clave and entrada
+            and entrada["checksum"] == clave
+            # Un renombrado conserva el md5 pero puede cambiar la hoja
+            and entrada.get("nombre") == ficha.get("name")
+        ):
+            entrada["usado"] = time.time()
+            self.hits += 1
+            return entrada
+
+        self.misses += 1
+        return None
+
+    def guardar(self, ficha, nombre_hoja, codigo, fila):
+        clave = self.clave(ficha)
+        if not clave:
+            return
+
+        self.entradas[ficha["id"]] = {
+            "checksum": clave,
+            "nombre": ficha.get("name"),
+            "hoja": nombre_hoja,
+            "codigo": codigo,
+            "fila": fila,
+            "usado": time.time()
+        }
+
+    def persistir(self):
+        # Expulsar entradas viejas y limitar tamaño (las más recientes se quedan)
+        limite = time.time() - self.max_dias * 86400
+        vigentes = sorted(
+            ((k, v) for k, v in self.entradas.items() if v["usado"] >= limite),
+            key=lambda kv: kv[1]["usado"],
+            reverse=True
+        )
+        self.entradas = dict(vigentes[:self.max_entradas])
+
+        carpeta = os.path.dirname(self.ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+
+        tmp = f"{self.ruta}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(
+                {"version": self.version, "entradas": self.entradas},
+                fh,
+                ensure_ascii=False
+            )
+        os.replace(tmp, self.ruta)
@@ -0,0 +1,125 @@
+FOLDER_MIME = "application/vnd.google-apps.folder"
+
+
+def _ficha_desde_archivo(archivo, nombre_area, anio):
+    return {
+        "id": archivo["id"],
+        "name": archivo["name"],
+        "area": nombre_area,
+        "anio": anio,
+        "mimeType": archivo.get("mimeType"),
+        "md5Checksum": archivo.get("md5Checksum"),
+        "modifiedTime": archivo.get("modifiedTime"),
+        "size": archivo.get("size"),
+        "shortcutDetails": archivo.get("shortcutDetails")
+    }
+
+
+def _es_ficha(archivo):
+    return archivo["name"].lower().endswith((".xlsx", ".xlsm"))
+
+
+# ----------------------------
+# DESCUBRIMIENTO CARPETA POR CARPETA
+# ----------------------------
+def buscar_fichas_por_carpetas(list_files_in_folder, fichas_folder_id, anio):
+    """
+    Recorre FICHAS → área → año → archivos con un listado por carpeta.
+    """
+
+    files_anio = []
+    areas = [
+        f for f in list_files_in_folder(fichas_folder_id)
+        if f.get("mimeType") == FOLDER_MIME
+    ]
+    print(f"📁 Áreas encontradas: {[a['name'] for a in areas]}")
+
+    for area in areas:
+        nombre_area = area["name"]
+        print(f"\n🔹 Leyendo área: {nombre_area}")
+        subfolders = [
+            f for f in list_files_in_folder(area["id"])
+            if f.get("mimeType") == FOLDER_MIME
+        ]
+        print(f"  📂 Subcarpetas: {[f['name'] for f in subfolders]}")
+
+        carpeta_anio = next((f for f in subfolders if f["name"] == anio), None)
+        if not carpeta_anio:
+            print(f"  ⚠ No existe carpeta para el año {anio} en {nombre_area}")
+            continue
+
+        archivos = [
+            f for f in list_files_in_folder(carpeta_anio["id"])
+            if _es_ficha(f)
+        ]
+        print(f"  📄 Archivos encontrados: {[f['name'] for f in archivos]}")
+
+        for archivo in archivos:
+            files_anio.append(_ficha_desde_archivo(archivo, nombre_area, anio))
+
+    return files_anio
+
+
+# ----------------------------
+# DESCUBRIMIENTO CON UNA BÚSQUEDA POR NIVEL
+# ----------------------------
+def construir_arbol(items, hijos=None):
+    """
+    Agrupa los ítems de una búsqueda por carpeta padre (en `hijos` si
+    se pasa).
+    """
+
+    hijos = {} if hijos is None else hijos
+    for item in items:
+        for parent in item.get("parents", []):
+            hijos.setdefault(parent, []).append(item)
+    return hijos
+
+
+def buscar_fichas_arbol(list_files_in_folders, fichas_folder_id, anio):
+    """
+    Igual que buscar_fichas_por_carpetas, pero cada nivel (áreas, años,
+    fichas) se lista con una sola búsqueda para todas sus carpetas
+    (list_files_in_folders); la jerarquía se arma en memoria con los
+    `parents` de cada ítem. Se listan las mismas carpetas y se filtra
+    igual, así que el resultado es el mismo.
+
+    Retorna:
+        files_anio (mismo formato que buscar_fichas_por_carpetas)
+        hijos (dict carpeta → ítems) para resolver otras carpetas sin
+        volver a consultar Drive
+    """
+
+    hijos = construir_arbol(list_files_in_folders([fichas_folder_id]))
+
+    def carpetas(parent_id):
+        return [f for f in hijos.get(parent_id, []) if f.get("mimeType") == FOLDER_MIME]
+
+    areas = carpetas(fichas_folder_id)
+    print(f"📁 Áreas encontradas: {[a['name'] for a in areas]}")
+
+    construir_arbol(list_files_in_folders([a["id"] for a in areas]), hijos)
+
+    carpetas_anio = {}
+    for area in areas:
+        carpeta_anio = next((f for f in carpetas(area["id"]) if f["name"] == anio), None)
+        if carpeta_anio:
+            carpetas_anio[area["id"]] = carpeta_anio
+        else:
+            print(f"  ⚠ No existe carpeta para el año {anio} en {area['name']}")
+
+    construir_arbol(list_files_in_folders([c["id"] for c in carpetas_anio.values()]), hijos)
+
+    files_anio = []
+    for area in areas:
+        carpeta_anio = carpetas_anio.get(area["id"])
+        if not carpeta_anio:
+            continue
+
+        archivos = [f for f in hijos.get(carpeta_anio["id"], []) if _es_ficha(f)]
+        print(f"🔹 {area['name']}: {len(archivos)} fichas")
+
+        for archivo in archivos:
+            files_anio.append(_ficha_desde_archivo(archivo, area["name"], anio))
+
+    return files_anio, hijos
@@ -0,0 +1,326 @@
+import hashlib
+import io
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from components.reintentos import ejecutar_peticion
+
+# ------------------------------------------
+# DRIVE LOCAL (CARPETAS DEL DISCO)
+# ------------------------------------------
+# Backend con las mismas funciones que drive_reader, pero sobre un
+# directorio local: cada carpeta/archivo tiene como ID su ruta relativa
+# a la raíz. Para usar los IDs fijos del proyecto (FICHAS_FOLDER_ID,
+# MANUAL_FILE_ID, ...) se puede dejar en la raíz un `ids.json`:
+#
+#     {"1Ugu1ud21AneX82I6SMMOcQyCRrIr9U4B": "FICHAS", ...}
+#
+# Las appProperties de cada archivo (propiedades de
+# create_or_update_file) se guardan en la raíz, en `propiedades.json`.
+#
+# Simula latencia y errores 429/5xx para medir concurrencia, reintentos
+# y cache sin red.
+
+FOLDER_MIME = "application/vnd.google-apps.folder"
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+MIME_POR_EXTENSION = {
+    ".xlsx": XLSX_MIME,
+    ".xlsm": "application/vnd.ms-excel.sheet.macroEnabled.12",
+    ".csv": "text/csv",
+}
+
+# Archivos de la raíz que no forman parte del "Drive"
+ARCHIVOS_INTERNOS = ("ids.json", "propiedades.json")
+
+# Carpetas por búsqueda en list_files_in_folders (como drive_reader)
+LOTE_CARPETAS = 50
+
+CONFIG = {
+    "raiz": os.getenv("DRIVE_LOCAL_RAIZ", "drive_local"),
+    "latencia_ms": float(os.getenv("DRIVE_LOCAL_LATENCIA_MS", "0")),
+    "prob_429": float(os.getenv("DRIVE_LOCAL_PROB_429", "0")),
+    "prob_5xx": float(os.getenv("DRIVE_LOCAL_PROB_5XX", "0")),
+}
+
+_azar = random.Random(os.getenv("DRIVE_LOCAL_SEMILLA"))
+_lock = threading.Lock()
+_alias = None
+
+# operación → llamadas / errores simulados
+_contadores = {}
+
+
+def configurar(raiz=None, latencia_ms=None, prob_429=None, prob_5xx=None, semilla=None):
+    """
+    Ajusta el backend sin variables de entorno (benchmarks).
+    """
+    global _alias
+
+    valores = {
+        "raiz": raiz,
+        "latencia_ms": latencia_ms,
+        "prob_429": prob_429,
+        "prob_5xx": prob_5xx,
+    }
+    with _lock:
+        CONFIG.update({k: v for k, v in valores.items() if v is not None})
+        if semilla is not None:
+            _azar.seed(semilla)
+        _alias = None
+        _contadores.clear()
+
+
+def estadisticas():
+    with _lock:
+        return {op: dict(c) for op, c in _contadores.items()}
+
+
+# ------------------------------------------
+# LATENCIA Y FALLOS SIMULADOS
+# ------------------------------------------
+def _simular(operacion):
+    with _lock:
+        contador = _contadores.setdefault(operacion, {"llamadas": 0, "429": 0, "5xx": 0})
+        contador["llamadas"] += 1
+        latencia = CONFIG["latencia_ms"] / 1000 * _azar.uniform(0.5, 1.5)
+        sorteo = _azar.random()
+
+        estado = None
+        if sorteo < CONFIG["prob_429"]:
+            estado = 429
+        elif sorteo < CONFIG["prob_429"] + CONFIG["prob_5xx"]:
+            estado = _azar.choice((500, 502, 503))
+        if estado:
+            contador["429" if estado == 429 else "5xx"] += 1
+
+    if latencia:
+        time.sleep(latencia)
+
+    if estado:
+        contenido = b'{"error": {"errors": [{"reason": "rateLimitExceeded"}]}}' if estado == 429 else b"{}"
+        raise HttpError(httplib2.Response({"status": estado}), contenido, uri=f"local://{operacion}")
+
+
+def _operacion(nombre, fn, bytes_movidos=None):
+    """
+    La "petición" local lanza el 429/5xx simulado a quien la ejecuta,
+    como request.execute: los reintentos son los de la vía común
+    (reintentos.ejecutar_peticion), la misma que usa drive_reader.
+    """
+
+    def execute():
+        _simular(nombre)
+        return fn()
+
+    return ejecutar_peticion(execute, nombre, bytes_movidos)
+
+
+# ------------------------------------------
+# IDS ↔ RUTAS
+# ------------------------------------------
+def _cargar_alias():
+    global _alias
+
+    if _alias is None:
+        ruta = os.path.join(CONFIG["raiz"], "ids.json")
+        if os.path.exists(ruta):
+            with open(ruta, "r", encoding="utf-8") as fh:
+                _alias = json.load(fh)
+        else:
+            _alias = {}
+    return _alias
+
+
+def _ruta(file_id):
+    raiz = os.path.abspath(CONFIG["raiz"])
+    relativa = _cargar_alias().get(file_id, file_id)
+    ruta = os.path.abspath(os.path.join(raiz, relativa))
+
+    if os.path.commonpath([raiz, ruta]) != raiz:
+        raise ValueError(f"❌ ID fuera de la raíz local: {file_id}")
+    return ruta
+
+
+def _id(ruta):
+    relativa = os.path.relpath(ruta, os.path.abspath(CONFIG["raiz"])).replace(os.sep, "/")
+    if relativa == ".":
+        relativa = ""
+    inverso = {v.strip("/"): k for k, v in _cargar_alias().items()}
+    return inverso.get(relativa, relativa)
+
+
+def _metadatos(ruta):
+    info = os.stat(ruta)
+    metadata = {
+        "id": _id(ruta),
+        "name": os.path.basename(ruta),
+        "modifiedTime": datetime.fromtimestamp(info.st_mtime, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "parents": [_id(os.path.dirname(ruta))],
+    }
+
+    if os.path.isdir(ruta):
+        metadata["mimeType"] = FOLDER_MIME
+        return metadata
+
+    with open(ruta, "rb") as fh:
+        metadata["md5Checksum"] = hashlib.md5(fh.read()).hexdigest()
+    propiedades = _leer_propiedades().get(metadata["id"])
+    if propiedades:
+        metadata["appProperties"] = propiedades
+    metadata["mimeType"] = MIME_POR_EXTENSION.get(
+        os.path.splitext(ruta)[1].lower(), "application/octet-stream"
+    )
+    metadata["size"] = str(info.st_size)
+    return metadata
+
+
+def _leer_propiedades():
+    ruta = os.path.join(CONFIG["raiz"], "propiedades.json")
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _guardar_propiedades(file_id, propiedades):
+    ruta = os.path.join(CONFIG["raiz"], "propiedades.json")
+    with _lock:
+        todas = _leer_propiedades()
+        todas[file_id] = propiedades
+
+        tmp = f"{ruta}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(todas, fh, indent=2)
+        os.replace(tmp, ruta)
+
+
+def _listar(ruta):
+    nombres = sorted(n for n in os.listdir(ruta) if n not in ARCHIVOS_INTERNOS and not n.endswith(".tmp"))
+    # Igual que orderBy="folder,name": primero carpetas
+    entradas = [os.path.join(ruta, n) for n in nombres]
+    return [_metadatos(e) for e in sorted(entradas, key=lambda e: not os.path.isdir(e))]
+
+
+# ------------------------------------------
+# FUNCIONES DEL BACKEND
+# ------------------------------------------
+def precalentar():
+    _cargar_alias()
+
+
+def reset_metadata_cache():
+    global _alias
+    _alias = None
+
+
+def prefetch_metadata(file_ids):
+    return None
+
+
+def shortcut_targets(archivos):
+    return []
+
+
+def list_files_in_folder(folder_id):
+    return _operacion("list", lambda: _listar(_ruta(folder_id)))
+
+
+list_folder_cached = list_files_in_folder
+
+
+def list_files_in_folders(folder_ids):
+    # Una "búsqueda" por lote de carpetas, como drive_reader
+    folder_ids = list(folder_ids)
+    items = []
+
+    for inicio in range(0, len(folder_ids), LOTE_CARPETAS):
+        lote = folder_ids[inicio:inicio + LOTE_CARPETAS]
+        items.extend(_operacion("list", lambda: [i for f in lote for i in _listar(_ruta(f))]))
+
+    return items
+
+
+def get_file_metadata(file_id):
+    return _operacion("get", lambda: _metadatos(_ruta(file_id)))
+
+
+def read_excel_from_drive(file_id, metadata=None):
+    def leer():
+        with open(_ruta(file_id), "rb") as fh:
+            return io.BytesIO(fh.read())
+
+    return _operacion("get_media", leer, lambda fh: len(fh.getbuffer()))
+
+
+def get_file_id_by_name(folder_id, filename):
+    # Como drive_reader: se resuelve con el listado de la carpeta
+    # (y con sus latencias y errores simulados)
+    archivos = list_files_in_folder(folder_id)
+    return next(
+        (a["id"] for a in archivos if a["name"] == filename and a["mimeType"] != FOLDER_MIME),
+        None
+    )
+
+
+def create_or_update_file(
+    bytes_data,
+    file_id=None,
+    filename="archivo.xlsx",
+    parent_folder_id=None,
+    mimetype=XLSX_MIME,
+    propiedades=None
+):
+    if file_id and os.path.isfile(_ruta(file_id)):
+        print(f"♻ Actualizando archivo: {filename}")
+        ruta, operacion = _ruta(file_id), "update"
+    else:
+        print(f"🆕 Creando archivo (ID inválido o no existe): {filename}")
+        ruta, operacion = os.path.join(_ruta(parent_folder_id or ""), filename), "create"
+
+    def escribir():
+        tmp = f"{ruta}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(bytes_data)
+        os.replace(tmp, ruta)
+        # Como Drive: sin propiedades se conservan las que ya tenía
+        if propiedades:
+            _guardar_propiedades(_id(ruta), propiedades)
+        return {"id": _id(ruta)}
+
+    return _operacion(operacion, escribir, lambda _: len(bytes_data))
+
+
+# ------------------------------------------
+# CAMBIOS (POR FECHA DE MODIFICACIÓN)
+# ------------------------------------------
+def get_start_page_token():
+    return str(time.time_ns())
+
+
+def list_changes(page_token):
+    desde = int(page_token)
+    nuevo_token = get_start_page_token()
+
+    def recorrer():
+        cambios = []
+        for carpeta, _, archivos in os.walk(_ruta("")):
+            for nombre in archivos:
+                ruta = os.path.join(carpeta, nombre)
+                if os.stat(ruta).st_mtime_ns > desde:
+                    file_id = _id(ruta)
+                    cambios.append({
+                        "fileId": file_id,
+                        "removed": False,
+                        "file": {"id": file_id, "name": nombre, "trashed": False},
+                    })
+        return cambios
+
+    return _operacion("changes", recorrer), nuevo_token
@@ -0,0 +1,181 @@
+import pandas as pd
+
+from components.valores_mes import columnas_meses, normalizar_meses
+
+# ----------------------------
+# ESQUEMA DEL BANCO
+# ----------------------------
+# Tipos declarados de las columnas del banco. Se aplican una vez al
+# cargar (y de nuevo tras el upsert y el cruce manual, que pueden
+# devolver columnas object); los resúmenes trabajan sobre los valores
+# ya normalizados.
+#
+#   - Dimensiones: categóricas con su escritura original (es la que
+#     se publica y por la que agrupan los resúmenes). El filtro de
+#     activos y la periodicidad usan clave_dimension (sin espacios y
+#     en mayúsculas), como siempre lo hicieron los resúmenes.
+#   - Meses: float64 + unidad (ver valores_mes).
+#   - Umbrales: float64 solo si todos los valores son números; si no,
+#     texto tal cual (ej. "50%", "N/A").
+
+# columna → los resúmenes agrupan por su clave (clave_dimension) en vez
+# de por el valor tal cual
+DIMENSIONES = {
+    "ÁREA": False,
+    "ESTADO DEL INDICADOR": False,
+    "PERIODICIDAD MEDICION": True,
+    "JERARQUÍA": False,
+    "TIPO DE INDICADOR": False,
+}
+
+UMBRALES = ["Critico", "Aceptable", "Satisfactorio"]
+
+COL_CODIGO = "CONSE"
+
+
+def _columna(df, nombre):
+    """
+    Nombre real de la columna sin importar mayúsculas (el render las
+    pasa a mayúsculas).
+    """
+    return next((c for c in df.columns if str(c).upper() == nombre.upper()), None)
+
+
+def incidencia(origen, codigo, mensaje):
+    """
+    Registro con el formato del log de fichas (sale en la hoja Errores
+    del reporte).
+    """
+    return {
+        "archivo": origen,
+        "hoja": None,
+        "codigo": codigo,
+        "accion": f"validacion: {mensaje}",
+        "ok": False,
+        "cache": None
+    }
+
+
+# ----------------------------
+# VALIDACIÓN (SOBRE EL TEXTO LEÍDO)
+# ----------------------------
+def validar_banco(banco, origen):
+    """
+    Problemas del banco tal como viene de Drive: columnas faltantes,
+    códigos vacíos/duplicados y meses con texto que no es un número
+    (quedan vacíos al convertirlos).
+    """
+    incidencias = []
+
+    faltantes = [
+        c for c in [COL_CODIGO, *DIMENSIONES, *UMBRALES]
+        if _columna(banco, c) is None
+    ]
+    for col in faltantes:
+        incidencias.append(incidencia(origen, None, f"falta la columna '{col}'"))
+
+    col_codigo = _columna(banco, COL_CODIGO)
+    if col_codigo is None:
+        return incidencias
+
+    codigos = banco[col_codigo]
+    vacios = codigos.isna() | (codigos.astype(str).str.strip() == "")
+    if vacios.any():
+        incidencias.append(incidencia(origen, None, f"{int(vacios.sum())} filas sin código"))
+
+    duplicados = codigos[~vacios & codigos.duplicated(keep="first")]
+    for codigo in duplicados.unique():
+        incidencias.append(incidencia(origen, codigo, "código duplicado"))
+
+    for col in columnas_meses(banco):
+        if pd.api.types.is_numeric_dtype(banco[col]):
+            continue
+        texto = banco[col].astype("string").str.strip()
+        numero = pd.to_numeric(
+            texto.str.replace("%", "", regex=False).str.replace(",", ".", regex=False),
+            errors="coerce"
+        )
+        invalidos = (
+            texto.notna()
+            & (texto != "")
+            & ~texto.str.contains("N/A", regex=False).fillna(False)
+            & numero.isna()
+        )
+        for codigo, valor in zip(codigos[invalidos], texto[invalidos]):
+            incidencias.append(incidencia(origen, codigo, f"{col} no numérico: '{valor}'"))
+
+    return incidencias
+
+
+# ----------------------------
+# TIPOS
+# ----------------------------
+def _umbral_a_numero(serie):
+    """
+    float64 si todos los valores no vacíos son números; si no, None.
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype("float64")
+
+    texto = serie.astype("string").str.strip()
+    numero = pd.to_numeric(texto.str.replace(",", ".", regex=False), errors="coerce")
+    vacio = texto.isna() | (texto == "")
+
+    if (numero.notna() | vacio).all():
+        return numero.astype("float64")
+    return None
+
+
+def aplicar_esquema(banco, incidencias=None, origen="banco"):
+    """
+    Aplica los tipos del esquema en el sitio y retorna el banco.
+
+    Con `incidencias` (lista) se valida primero y se agregan ahí los
+    problemas encontrados. Es idempotente.
+    """
+    if incidencias is not None:
+        incidencias.extend(validar_banco(banco, origen))
+
+    for nombre in DIMENSIONES:
+        col = _columna(banco, nombre)
+        if col is None:
+            continue
+
+        serie = banco[col]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            serie = serie.astype(object)
+
+        banco[col] = serie.astype("category")
+
+    for nombre in UMBRALES:
+        col = _columna(banco, nombre)
+        if col is None:
+            continue
+        numero = _umbral_a_numero(banco[col])
+        if numero is not None:
+            banco[col] = numero
+
+    return normalizar_meses(banco)
+
+
+def clave_dimension(serie):
+    """
+    Dimensión para comparar y agrupar: sin espacios a los lados y en
+    mayúsculas, igual que el .astype(str).str.strip().str.upper() de
+    los resúmenes (un nulo queda "NONE"). No se escribe en el banco.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype(object)
+
+    claves = serie.where(serie.notna(), None).astype(str).str.strip().str.upper()
+    return claves.astype("category")
+
+
+def umbral_como_texto(serie):
+    """
+    Umbral para mostrar: los numéricos sin decimales sobrantes
+    (90.0 → "90"), los de texto como vienen.
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.map(lambda v: "" if pd.isna(v) else f"{v:g}")
+    return serie
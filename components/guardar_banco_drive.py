@@ -1,26 +1,101 @@
 import io
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+import itertools
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Font, Alignment, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
 from openpyxl.utils.dataframe import dataframe_to_rows
 from components.resumen import generar_resumenes
 from components.modelo_atencion import generar_resumen_modelo_atencion
+from components.valores_mes import formatear_meses
+from components.esquema_banco import UMBRALES, umbral_como_texto
+from components.salida_determinista import xlsx_determinista
 
 import pandas as pd
 
 
-def guardar_banco_con_estilos_drive(
-    banco,
-    create_or_update_file,
-    banco_file_id,
-    banco_folder_id,
-    filename="Banco_Indicadores.xlsx"
-):
+# --------------------------------------------------
+# Estilos (compartidos por nombre, no uno por celda)
+# --------------------------------------------------
+def registrar_estilos(wb):
+    thin_border = Border(
+        left=Side(style="thin"),
+        right=Side(style="thin"),
+        top=Side(style="thin"),
+        bottom=Side(style="thin")
+    )
+    header_fill = PatternFill(start_color="A7D08C", end_color="A7D08C", fill_type="solid")
+    header_font = Font(bold=True, color="000000")
+    center_align = Alignment(horizontal="center", vertical="center", wrap_text=True)
+
+    # Encabezado por defecto de pandas (columnas sin color propio)
+    simple = dict(
+        font=Font(bold=True),
+        border=thin_border,
+        alignment=Alignment(horizontal="center", vertical="top")
+    )
+    encabezado = dict(fill=header_fill, font=header_font, alignment=center_align, border=thin_border)
+
+    estilos = [
+        NamedStyle("encabezado", **encabezado),
+        NamedStyle("encabezado_simple", **simple),
+        NamedStyle("encabezado_critico", **simple, fill=PatternFill(start_color="FF0000", fill_type="solid")),
+        NamedStyle("encabezado_aceptable", **simple, fill=PatternFill(start_color="FFFF00", fill_type="solid")),
+        NamedStyle(
+            "encabezado_satisfactorio",
+            **{**encabezado, "fill": PatternFill(start_color="00FF00", fill_type="solid")}
+        ),
+        NamedStyle(
+            "celda",
+            border=thin_border,
+            alignment=Alignment(horizontal="left", vertical="top", wrap_text=True)
+        ),
+        NamedStyle(
+            "titulo_modelo",
+            font=Font(bold=True),
+            border=thin_border,
+            alignment=Alignment(horizontal="center", vertical="center")
+        ),
+    ]
+
+    for estilo in estilos:
+        wb.add_named_style(estilo)
+
+
+def celda(ws, valor, estilo):
+    # NaN / None → celda vacía (igual que to_excel)
+    if valor is not None and not isinstance(valor, str) and pd.isna(valor):
+        valor = None
+    c = WriteOnlyCell(ws, value=valor)
+    c.style = estilo
+    return c
+
+
+def fijar_anchos(ws, df, encabezados, tope):
     """
-    Aplica estilos al banco y lo guarda en Google Drive.
+    Ancho de cada columna según el texto más largo (encabezados y
+    datos), calculado con operaciones vectorizadas sobre el DataFrame.
+    """
+    datos = pd.DataFrame(df.to_numpy(dtype=object))
+    vacios = datos.isna() | datos.isin(["", 0, False])
+    largos = datos.astype(str).apply(lambda s: s.str.len()).mask(vacios, 0)
+    max_datos = largos.max().fillna(0).astype(int).tolist() if len(datos) else [0] * len(df.columns)
+
+    for col, max_len in enumerate(max_datos, 1):
+        for fila in encabezados:
+            valor = fila[col - 1]
+            if valor:
+                max_len = max(max_len, len(str(valor)))
+        ws.column_dimensions[get_column_letter(col)].width = min(max_len + 2, tope)
+
+
+def renderizar_banco_con_estilos(banco):
+    """
+    Aplica estilos al banco, agrega las hojas de resumen y retorna
+    los bytes del xlsx (sin subir nada).
     """
 
-    print("🎨 Aplicando estilos y guardando Banco en Drive...")
+    print("🎨 Aplicando estilos al Banco...")
 
     # --------------------------------------------------
     # 🔹 Normalizar columnas del banco (MUY IMPORTANTE)
@@ -61,93 +136,83 @@ def guardar_banco_con_estilos_drive(
             raise ValueError(f"❌ No se encontró la clave '{nombre}' en generar_resumenes()")
 
     # --------------------------------------------------
-    # Guardar banco en memoria
+    # 🔹 Meses y umbrales numéricos → texto del Excel (solo para
+    #    escribir; el banco publicado queda como se leyó)
     # --------------------------------------------------
-    buffer = io.BytesIO()
-    banco.to_excel(buffer, index=False)
-    buffer.seek(0)
-
-    wb = load_workbook(buffer)
-    ws = wb.active
+    banco = formatear_meses(banco)
+    for col in UMBRALES:
+        if col.upper() in banco.columns:
+            banco[col.upper()] = umbral_como_texto(banco[col.upper()])
 
     # --------------------------------------------------
-    # Estilos
+    # Libro en modo write-only (filas en streaming)
     # --------------------------------------------------
-    header_fill = PatternFill(start_color="A7D08C", end_color="A7D08C", fill_type="solid")
-    header_font = Font(bold=True, color="000000")
-    center_align = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    thin_border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin")
-    )
+    wb = Workbook(write_only=True)
+    registrar_estilos(wb)
 
+    # --------------------------------------------------
+    # Hoja principal (banco)
+    # --------------------------------------------------
     columnas_sin_color = ["Q", "R", "S"]
+    estilos_encabezado_banco = {"R": "encabezado_critico", "S": "encabezado_aceptable", "T": "encabezado_satisfactorio"}
 
-    for col in range(1, ws.max_column + 1):
-        col_letter = get_column_letter(col)
-        cell = ws.cell(row=1, column=col)
-        if col_letter not in columnas_sin_color:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = center_align
-            cell.border = thin_border
-
-    ws["R1"].fill = PatternFill(start_color="FF0000", fill_type="solid")
-    ws["S1"].fill = PatternFill(start_color="FFFF00", fill_type="solid")
-    ws["T1"].fill = PatternFill(start_color="00FF00", fill_type="solid")
-
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row, max_col=ws.max_column):
-        for cell in row:
-            cell.border = thin_border
-            cell.alignment = Alignment(horizontal="left", vertical="top", wrap_text=True)
-
-    for col in ws.columns:
-        max_len = max(len(str(c.value)) if c.value else 0 for c in col)
-        col_letter = get_column_letter(col[0].column)
-        ws.column_dimensions[col_letter].width = min(max_len + 2, 50)
-
-    for row in range(2, ws.max_row + 1):
-        ws.row_dimensions[row].height = 30
-
-    ws.auto_filter.ref = f"A1:{get_column_letter(ws.max_column)}{ws.max_row}"
+    ws = wb.create_sheet("Sheet1")
+    max_col = len(banco.columns)
+    max_row = len(banco) + 1
+
+    fijar_anchos(ws, banco, [list(banco.columns)], tope=50)
     ws.freeze_panes = "C2"
 
+    encabezado = []
+    for col, valor in enumerate(banco.columns, 1):
+        col_letter = get_column_letter(col)
+        if col_letter in estilos_encabezado_banco:
+            estilo = estilos_encabezado_banco[col_letter]
+        elif col_letter in columnas_sin_color:
+            estilo = "encabezado_simple"
+        else:
+            estilo = "encabezado"
+        encabezado.append(celda(ws, valor, estilo))
+    ws.append(encabezado)
+
+    for row_idx, fila in enumerate(banco.itertuples(index=False, name=None), 2):
+        ws.row_dimensions[row_idx].height = 30
+        ws.append([celda(ws, valor, "celda") for valor in fila])
+
+    ws.auto_filter.ref = f"A1:{get_column_letter(max_col)}{max_row}"
+
     # ==================================================
     # 📊 AGREGAR HOJAS DE RESUMEN
     # ==================================================
 
-    def agregar_hoja_resumen(nombre, df):
+    def agregar_hoja_resumen(nombre, df, filas_encabezado=1, especiales=None):
+        """
+        Escribe la hoja en una sola pasada. `especiales` permite cambiar
+        valor/estilo de celdas puntuales: {(fila, col): (valor, estilo)}.
+        """
         if df is None or df.empty:
             print(f"⚠️ Hoja {nombre} vacía, no se crea.")
-            return
+            return None
 
         ws_res = wb.create_sheet(title=nombre)
+        filas = dataframe_to_rows(df, index=False, header=True)
 
-        for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), 1):
-            for c_idx, value in enumerate(row, 1):
-                ws_res.cell(row=r_idx, column=c_idx, value=value)
-
-        for col in range(1, ws_res.max_column + 1):
-            cell = ws_res.cell(row=1, column=col)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = center_align
-            cell.border = thin_border
+        encabezados = [next(filas) for _ in range(filas_encabezado)]
+        fijar_anchos(ws_res, df, encabezados, tope=40)
+        # Congelar bajo el encabezado (A3 si son 2 filas)
+        ws_res.freeze_panes = f"A{filas_encabezado + 1}"
 
-        for row in ws_res.iter_rows(min_row=2, max_row=ws_res.max_row, max_col=ws_res.max_column):
-            for cell in row:
-                cell.border = thin_border
-                cell.alignment = Alignment(horizontal="left", vertical="top", wrap_text=True)
+        especiales = especiales or {}
+        for r_idx, row in enumerate(itertools.chain(encabezados, filas), 1):
+            estilo = "encabezado" if r_idx == 1 else "celda"
+            ws_res.append([
+                celda(ws_res, *especiales.get((r_idx, c_idx), (value, estilo)))
+                for c_idx, value in enumerate(row, 1)
+            ])
 
-        for col in ws_res.columns:
-            max_len = max(len(str(c.value)) if c.value else 0 for c in col)
-            col_letter = get_column_letter(col[0].column)
-            ws_res.column_dimensions[col_letter].width = min(max_len + 2, 40)
-
-        ws_res.auto_filter.ref = f"A1:{get_column_letter(ws_res.max_column)}{ws_res.max_row}"
-        ws_res.freeze_panes = "A2"
+        max_col_letter = get_column_letter(len(df.columns))
+        ws_res.auto_filter.ref = f"A1:{max_col_letter}{len(df) + filas_encabezado}"
+        return ws_res
 
     # Crear hojas
     agregar_hoja_resumen("Resumen_Area", resumen_area)
@@ -157,84 +222,80 @@ def guardar_banco_con_estilos_drive(
     agregar_hoja_resumen("Resumen_Jerarquia", resumen_jerarquia)
     agregar_hoja_resumen("Resumen_Tipo", resumen_tipo)
     agregar_hoja_resumen("Resumen_Cumple", resumen_cumple)
-    agregar_hoja_resumen("Modelo_Atencion", modelo_atencion)
     
     
     # ==================================================
     # 🎯 FORMATO ESPECIAL HOJA MODELO_ATENCION
     # ==================================================
+    # Encabezado de 2 filas (MultiIndex) y, al final, 3 filas de
+    # VALORACIÓN GENERAL
+    filas_encabezado = modelo_atencion.columns.nlevels
+    max_row = len(modelo_atencion) + filas_encabezado
+    fila_inicio = max_row - 2
+    f1 = fila_inicio
+    f3 = fila_inicio + 2
+
+    ws_modelo = agregar_hoja_resumen(
+        "Modelo_Atencion",
+        modelo_atencion,
+        filas_encabezado=filas_encabezado,
+        especiales={(f1, 1): ("VALORACIÓN GENERAL", "titulo_modelo")}
+    )
 
-    ws_modelo = wb["Modelo_Atencion"]
-    
     # ==================================================
     # 🎯 AJUSTAR FILTRO PARA QUE ESTÉ EN FILA 2
     # ==================================================
-
-    max_col_letter = get_column_letter(ws_modelo.max_column)
-    max_row = ws_modelo.max_row
-
-    # Quitar filtro anterior (el que se puso en fila 1)
-    ws_modelo.auto_filter.ref = None
-
-    # Aplicar filtro desde fila 2
+    max_col_letter = get_column_letter(len(modelo_atencion.columns))
     ws_modelo.auto_filter.ref = f"A2:{max_col_letter}{max_row}"
 
-    # Congelar hasta fila 3 (para mantener visibles las 2 filas de encabezado)
-    ws_modelo.freeze_panes = "A3"
-
-    # Detectar últimas 3 filas (VALORACIÓN GENERAL)
-    fila_inicio = ws_modelo.max_row - 2
-    f1 = fila_inicio
-    f2 = fila_inicio + 1
-    f3 = fila_inicio + 2
-
     # --------------------------------------------------
     # 1️⃣ Combinar A:D para VALORACIÓN GENERAL
+    # 2️⃣ Combinar Meta + Medición por trimestre
+    #    T1 → E:F, T2 → H:I, T3 → K:L, T4 → N:O
     # --------------------------------------------------
-    ws_modelo.merge_cells(f"A{f1}:D{f3}")
+    ws_modelo.merged_cells.add(f"A{f1}:D{f3}")
+    for inicio, fin in [("E", "F"), ("H", "I"), ("K", "L"), ("N", "O")]:
+        for fila in range(f1, f3 + 1):
+            ws_modelo.merged_cells.add(f"{inicio}{fila}:{fin}{fila}")
 
-    celda = ws_modelo[f"A{f1}"]
-    celda.value = "VALORACIÓN GENERAL"
-    celda.alignment = Alignment(horizontal="center", vertical="center")
-    celda.font = Font(bold=True)
+    buffer_out = io.BytesIO()
+    wb.save(buffer_out)
 
-    # --------------------------------------------------
-    # 2️⃣ Combinar Meta + Medición por trimestre
-    # (según estructura actual)
-    # --------------------------------------------------
+    # Mismo banco → mismos bytes (sin fechas de guardado)
+    return xlsx_determinista(buffer_out.getvalue())
 
-    # T1 → columnas E y F
-    ws_modelo.merge_cells(f"E{f1}:F{f1}")
-    ws_modelo.merge_cells(f"E{f2}:F{f2}")
-    ws_modelo.merge_cells(f"E{f3}:F{f3}")
 
-    # T2 → columnas H y I
-    ws_modelo.merge_cells(f"H{f1}:I{f1}")
-    ws_modelo.merge_cells(f"H{f2}:I{f2}")
-    ws_modelo.merge_cells(f"H{f3}:I{f3}")
+def publicar_banco_drive(bytes_data, create_or_update_file, destinos):
+    """
+    Sube el mismo xlsx ya renderizado a varios destinos.
 
-    # T3 → columnas K y L
-    ws_modelo.merge_cells(f"K{f1}:L{f1}")
-    ws_modelo.merge_cells(f"K{f2}:L{f2}")
-    ws_modelo.merge_cells(f"K{f3}:L{f3}")
+    destinos: lista de dicts con folder_id, filename y file_id
+    (file_id None → se crea el archivo).
+    """
 
-    # T4 → columnas N y O
-    ws_modelo.merge_cells(f"N{f1}:O{f1}")
-    ws_modelo.merge_cells(f"N{f2}:O{f2}")
-    ws_modelo.merge_cells(f"N{f3}:O{f3}")
+    for destino in destinos:
+        create_or_update_file(
+            bytes_data=bytes_data,
+            file_id=destino.get("file_id"),
+            filename=destino["filename"],
+            parent_folder_id=destino["folder_id"]
+        )
+        print(f"✅ Banco guardado correctamente en Drive: {destino['filename']}")
 
-    # --------------------------------------------------
-    # Subir a Drive
-    # --------------------------------------------------
-    buffer_out = io.BytesIO()
-    wb.save(buffer_out)
-    buffer_out.seek(0)
 
-    create_or_update_file(
-        bytes_data=buffer_out.getvalue(),
-        file_id=banco_file_id,
-        filename=filename,
-        parent_folder_id=banco_folder_id
-    )
+def guardar_banco_con_estilos_drive(
+    banco,
+    create_or_update_file,
+    banco_file_id,
+    banco_folder_id,
+    filename="Banco_Indicadores.xlsx"
+):
+    """
+    Aplica estilos al banco y lo guarda en Google Drive.
+    """
 
-    print("✅ Banco guardado correctamente en Drive")
\ No newline at end of file
+    publicar_banco_drive(
+        renderizar_banco_con_estilos(banco),
+        create_or_update_file,
+        [{"folder_id": banco_folder_id, "filename": filename, "file_id": banco_file_id}]
+    )
\ No newline at end of file
@@ -1,25 +1,37 @@
 import io
 import pandas as pd
 
+from components.salida_determinista import md5_bytes, xlsx_determinista
 
-def guardar_reportes_drive(
+
+def generar_reportes(
     registros,
     get_file_id_by_name,
-    create_or_update_file,
     reporte_folder_id,
     filename_excel="Reporte_Indicadores.xlsx",
-    filename_csv="Reporte_Indicadores.csv"
+    filename_csv="Reporte_Indicadores.csv",
+    tiempos=None
 ):
     """
-    Genera y guarda reportes (Excel y CSV) en Google Drive.
+    Genera los reportes (Excel y CSV) sin subirlos.
+
+    tiempos: DataFrame opcional (telemetria.tabla_tiempos) que se
+    agrega como hoja "Tiempos". Como cambia en cada ejecución, con ella
+    el Excel lleva las propiedades `md5_contenido` (md5 del libro sin
+    esa hoja) y `md5` (del libro completo): publicar_drive lo omite si
+    el contenido no cambió, y la hoja Tiempos publicada queda la de la
+    última ejecución que sí lo cambió.
+
+    Retorna la lista de tareas de subida (argumentos de
+    create_or_update_file) para publicarlas juntas.
     """
 
-    print("📄 Generando reportes en Drive...")
+    print("📄 Generando reportes...")
 
     # ----------------------------
     # DataFrame de reporte
     # ----------------------------
-    columnas_base = ["archivo", "hoja", "codigo", "accion", "ok"]
+    columnas_base = ["archivo", "hoja", "codigo", "accion", "ok", "cache"]
     df_rep = (
         pd.DataFrame(registros)
         if registros
@@ -29,45 +41,93 @@ def guardar_reportes_drive(
     # ----------------------------
     # REPORTE EXCEL
     # ----------------------------
-    file_id_excel = get_file_id_by_name(reporte_folder_id, filename_excel)
-
-    with io.BytesIO() as buffer_excel:
-        with pd.ExcelWriter(buffer_excel, engine="openpyxl") as writer:
-            df_rep.to_excel(writer, sheet_name="Reporte Completo", index=False)
-
-            if not df_rep.empty:
-                df_rep[df_rep["accion"] == "actualizado"].to_excel(
-                    writer, sheet_name="Actualizados", index=False
-                )
-                df_rep[df_rep["accion"] == "agregado"].to_excel(
-                    writer, sheet_name="Agregados", index=False
-                )
-                df_rep[df_rep["ok"] == False].to_excel(
-                    writer, sheet_name="Errores", index=False
-                )
-
-        buffer_excel.seek(0)
-        create_or_update_file(
-            bytes_data=buffer_excel.read(),
-            file_id=file_id_excel,
-            filename=filename_excel,
-            parent_folder_id=reporte_folder_id
-        )
+    def libro_excel(tiempos=None):
+        with io.BytesIO() as buffer_excel:
+            with pd.ExcelWriter(buffer_excel, engine="openpyxl") as writer:
+                df_rep.to_excel(writer, sheet_name="Reporte Completo", index=False)
+
+                if not df_rep.empty:
+                    df_rep[df_rep["accion"] == "actualizado"].to_excel(
+                        writer, sheet_name="Actualizados", index=False
+                    )
+                    df_rep[df_rep["accion"] == "agregado"].to_excel(
+                        writer, sheet_name="Agregados", index=False
+                    )
+                    df_rep[df_rep["ok"] == False].to_excel(
+                        writer, sheet_name="Errores", index=False
+                    )
+
+                # Hits / misses de la cache local de fichas
+                if "cache" in df_rep.columns:
+                    resumen_cache = (
+                        df_rep["cache"]
+                        .value_counts()
+                        .rename_axis("cache")
+                        .reset_index(name="fichas")
+                    )
+                    resumen_cache.to_excel(writer, sheet_name="Cache", index=False)
+
+                # Tiempos y llamadas a Drive por etapa
+                if tiempos is not None and not tiempos.empty:
+                    tiempos.to_excel(writer, sheet_name="Tiempos", index=False)
+
+            return xlsx_determinista(buffer_excel.getvalue())
+
+    bytes_excel = libro_excel(tiempos)
 
     # ----------------------------
     # REPORTE CSV
     # ----------------------------
-    file_id_csv = get_file_id_by_name(reporte_folder_id, filename_csv)
-
     with io.BytesIO() as buffer_csv:
-        df_rep.to_csv(buffer_csv, index=False)
-        buffer_csv.seek(0)
-        create_or_update_file(
-            bytes_data=buffer_csv.read(),
-            file_id=file_id_csv,
-            filename=filename_csv,
-            parent_folder_id=reporte_folder_id,
-            mimetype="text/csv"
-        )
+        # Fin de línea fijo: el mismo CSV en cualquier sistema
+        df_rep.to_csv(buffer_csv, index=False, lineterminator="\n")
+        bytes_csv = buffer_csv.getvalue()
+
+    tarea_excel = {
+        "bytes_data": bytes_excel,
+        "file_id": get_file_id_by_name(reporte_folder_id, filename_excel),
+        "filename": filename_excel,
+        "parent_folder_id": reporte_folder_id
+    }
+    if tiempos is not None and not tiempos.empty:
+        tarea_excel["propiedades"] = {
+            "md5_contenido": md5_bytes(libro_excel()),
+            "md5": md5_bytes(bytes_excel)
+        }
+
+    return [
+        tarea_excel,
+        {
+            "bytes_data": bytes_csv,
+            "file_id": get_file_id_by_name(reporte_folder_id, filename_csv),
+            "filename": filename_csv,
+            "parent_folder_id": reporte_folder_id,
+            "mimetype": "text/csv"
+        },
+    ]
+
+
+def guardar_reportes_drive(
+    registros,
+    get_file_id_by_name,
+    create_or_update_file,
+    reporte_folder_id,
+    filename_excel="Reporte_Indicadores.xlsx",
+    filename_csv="Reporte_Indicadores.csv"
+):
+    """
+    Genera y guarda reportes (Excel y CSV) en Google Drive.
+    """
+
+    tareas = generar_reportes(
+        registros,
+        get_file_id_by_name,
+        reporte_folder_id,
+        filename_excel=filename_excel,
+        filename_csv=filename_csv
+    )
+
+    for tarea in tareas:
+        create_or_update_file(**tarea)
 
     print("✔ Reportes Excel y CSV creados/actualizados correctamente en Drive ✅")
@@ -0,0 +1,98 @@
+import json
+import os
+
+
+# ----------------------------
+# ESTADO DEL MODO INCREMENTAL
+# ----------------------------
+def leer_estado(ruta):
+    if not os.path.exists(ruta):
+        return {}
+
+    try:
+        with open(ruta, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        print("⚠ Estado incremental ilegible, se hará una ejecución completa")
+        return {}
+
+
+def guardar_estado(ruta, start_page_token):
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+
+    tmp = f"{ruta}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({"startPageToken": start_page_token}, fh)
+    os.replace(tmp, ruta)
+
+
+# ----------------------------
+# VERIFICACIÓN ANTES DE PUBLICAR
+# ----------------------------
+def filas_reconstruccion(banco_cargado, registros, col_codigo):
+    """
+    Filas que dejaría una reconstrucción completa: las del banco
+    cargado más un código nuevo por cada uno que traen las fichas.
+    """
+    nuevos = {r["codigo"] for r in registros if r["ok"]} - set(banco_cargado[col_codigo].dropna())
+    return len(banco_cargado) + len(nuevos)
+
+
+def verificar_filas_banco(filas, esperadas, permitir=False):
+    """
+    Una ejecución incremental debe dejar el banco con las mismas filas
+    que una completa; si quedan menos, algo se perdió y no se publica
+    (salvo con PERMITIR_BANCO_MENOR=1, que solo avisa).
+    """
+    if filas >= esperadas:
+        return
+
+    mensaje = (
+        f"El banco incremental quedó con {filas} filas y una ejecución completa "
+        f"dejaría {esperadas}"
+    )
+    if permitir:
+        print(f"⚠ {mensaje}: se publica igual (PERMITIR_BANCO_MENOR=1)")
+        return
+
+    raise ValueError(f"❌ {mensaje}: no se publica (PERMITIR_BANCO_MENOR=1 para publicar igual)")
+
+
+# ----------------------------
+# CAMBIOS RELEVANTES
+# ----------------------------
+def ids_cambiados(cambios):
+    """
+    IDs de archivos modificados por otras personas.
+
+    Se ignoran los borrados (el banco es acumulativo) y los cambios
+    hechos por la propia cuenta de servicio (las subidas de la
+    ejecución anterior).
+    """
+
+    ids = set()
+    for cambio in cambios:
+        archivo = cambio.get("file") or {}
+
+        if cambio.get("removed") or archivo.get("trashed"):
+            continue
+        if archivo.get("lastModifyingUser", {}).get("me"):
+            continue
+
+        ids.add(cambio["fileId"])
+
+    return ids
+
+
+def filtrar_fichas_cambiadas(files_anio, ids):
+    """
+    Fichas cuyo archivo (o el destino de su acceso directo) cambió.
+    """
+
+    return [
+        f for f in files_anio
+        if f["id"] in ids
+        or (f.get("shortcutDetails") or {}).get("targetId") in ids
+    ]
@@ -0,0 +1,324 @@
+import posixpath
+import re
+import zipfile
+from xml.etree.ElementTree import iterparse, parse
+
+from openpyxl.styles.numbers import builtin_format_code, is_date_format, is_timedelta_format
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, WINDOWS_EPOCH, from_excel, from_ISO8601
+
+# ----------------------------
+# LECTOR MÍNIMO DE XLSX
+# ----------------------------
+# Lee solo las celdas que se piden, directo del zip: ubica la hoja por
+# workbook.xml y sus rels, recorre la hoja en streaming hasta la última
+# fila pedida y resuelve solo las cadenas compartidas que aparecen en
+# esas filas. Los valores son los mismos de openpyxl con data_only=True.
+#
+# Ante cualquier estructura inesperada lanza una excepción; quien lo
+# usa vuelve a openpyxl (ver procesar_fichas.parsear_ficha).
+
+NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_PKG = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+TIPO_WORKSHEET = "/worksheet"
+TIPO_STRINGS = "/sharedStrings"
+TIPO_ESTILOS = "/styles"
+TIPO_LIBRO = "/officeDocument"
+
+_COORDENADA = re.compile(r"^([A-Z]{1,3})(\d+)$")
+
+
+class EstructuraNoSoportada(Exception):
+    pass
+
+
+class _Celda:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+_VACIA = _Celda(None)
+
+
+def _columna(letras):
+    n = 0
+    for letra in letras:
+        n = n * 26 + ord(letra) - 64
+    return n
+
+
+def _relaciones(zf, ruta_parte):
+    """
+    rId → (tipo, ruta en el zip) de las relaciones de una parte.
+    """
+    carpeta, nombre = posixpath.split(ruta_parte)
+    ruta_rels = posixpath.join(carpeta, "_rels", f"{nombre}.rels")
+
+    rels = {}
+    for rel in parse(zf.open(ruta_rels)).getroot().iter(f"{NS_PKG}Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        destino = rel.get("Target")
+        if destino.startswith("/"):
+            ruta = destino.lstrip("/")
+        else:
+            ruta = posixpath.normpath(posixpath.join(carpeta, destino))
+        rels[rel.get("Id")] = (rel.get("Type", ""), ruta)
+    return rels
+
+
+def _texto(nodo):
+    """
+    Texto de <si>/<is> como Text.content de openpyxl: <t> más los <r><t>
+    (sin las lecturas fonéticas <rPh>).
+    """
+    partes = []
+    t = nodo.find(f"{NS}t")
+    if t is not None and t.text:
+        partes.append(t.text)
+    for r in nodo.findall(f"{NS}r"):
+        t = r.find(f"{NS}t")
+        if t is not None and t.text:
+            partes.append(t.text)
+    return "".join(partes)
+
+
+# ----------------------------
+# LIBRO
+# ----------------------------
+class LibroXlsx:
+    """
+    Lo mínimo de un workbook de openpyxl que usa extraer_ficha:
+    `sheetnames`, `libro[nombre]` y `hoja["L5"].value`.
+    """
+
+    def __init__(self, datos, filas=1):
+        # Filas que se leen de una vez en el primer acceso a cada hoja
+        self.filas = filas
+        self._zip = zipfile.ZipFile(datos)
+
+        raiz = _relaciones(self._zip, "")
+        libros = [ruta for tipo, ruta in raiz.values() if tipo.endswith(TIPO_LIBRO)]
+        if len(libros) != 1:
+            raise EstructuraNoSoportada("sin workbook principal")
+        ruta_libro = libros[0]
+
+        libro = parse(self._zip.open(ruta_libro)).getroot()
+        if libro.tag != f"{NS}workbook":
+            raise EstructuraNoSoportada(f"workbook inesperado: {libro.tag}")
+
+        propiedades = libro.find(f"{NS}workbookPr")
+        fecha1904 = propiedades is not None and propiedades.get("date1904", "").lower() in ("1", "true")
+        self.epoch = CALENDAR_MAC_1904 if fecha1904 else WINDOWS_EPOCH
+
+        self._rels = _relaciones(self._zip, ruta_libro)
+        self._hojas = {}
+        self._rutas = {}
+        for hoja in libro.iter(f"{NS}sheet"):
+            tipo, ruta = self._rels[hoja.get(f"{NS_REL}id")]
+            self._rutas[hoja.get("name")] = (tipo, ruta)
+
+        self.sheetnames = list(self._rutas)
+
+        self._ruta_strings = next((r for t, r in self._rels.values() if t.endswith(TIPO_STRINGS)), None)
+        self._ruta_estilos = next((r for t, r in self._rels.values() if t.endswith(TIPO_ESTILOS)), None)
+        self._estilos = None
+
+    def __getitem__(self, nombre):
+        hoja = self._hojas.get(nombre)
+        if hoja is None:
+            tipo, ruta = self._rutas[nombre]
+            if not tipo.endswith(TIPO_WORKSHEET):
+                raise EstructuraNoSoportada(f"hoja '{nombre}' no es una worksheet")
+            hoja = self._hojas[nombre] = HojaXlsx(self, ruta)
+        return hoja
+
+    # ----------------------------
+    # Cadenas compartidas
+    # ----------------------------
+    def cadenas(self, indices):
+        """
+        Solo las cadenas compartidas pedidas; se deja de leer después de
+        la mayor.
+        """
+        if not indices:
+            return {}
+        if self._ruta_strings is None:
+            raise EstructuraNoSoportada("celdas 's' sin sharedStrings")
+
+        ultimo = max(indices)
+        encontradas = {}
+        posicion = 0
+
+        for _, nodo in iterparse(self._zip.open(self._ruta_strings)):
+            if nodo.tag != f"{NS}si":
+                continue
+            if posicion in indices:
+                encontradas[posicion] = _texto(nodo).replace("x005F_", "")
+            nodo.clear()
+            if posicion == ultimo:
+                break
+            posicion += 1
+
+        if len(encontradas) != len(indices):
+            raise EstructuraNoSoportada("índice de cadena compartida fuera de rango")
+        return encontradas
+
+    # ----------------------------
+    # Estilos de fecha (como Stylesheet._normalise_numbers)
+    # ----------------------------
+    def estilos_fecha(self):
+        if self._estilos is None:
+            fechas, duraciones = set(), set()
+
+            if self._ruta_estilos:
+                raiz = parse(self._zip.open(self._ruta_estilos)).getroot()
+                propios = {
+                    int(n.get("numFmtId")): n.get("formatCode")
+                    for n in raiz.iter(f"{NS}numFmt")
+                }
+                xfs = raiz.find(f"{NS}cellXfs")
+
+                for idx, xf in enumerate(xfs if xfs is not None else []):
+                    num_fmt = int(xf.get("numFmtId", 0))
+                    fmt = propios.get(num_fmt) if num_fmt in propios else builtin_format_code(num_fmt)
+                    if is_date_format(fmt):
+                        fechas.add(idx)
+                    if is_timedelta_format(fmt):
+                        duraciones.add(idx)
+
+            self._estilos = (fechas, duraciones)
+        return self._estilos
+
+
+# ----------------------------
+# HOJA
+# ----------------------------
+class HojaXlsx:
+    def __init__(self, libro, ruta):
+        self._libro = libro
+        self._eventos = iterparse(libro._zip.open(ruta), events=("start", "end"))
+        self._celdas = {}
+        self._ultima_fila = 0
+        self._terminada = False
+        self._fila_siguiente = None
+
+    def __getitem__(self, coordenada):
+        m = _COORDENADA.match(coordenada)
+        if not m:
+            raise EstructuraNoSoportada(f"coordenada no soportada: {coordenada}")
+
+        fila = int(m.group(2))
+        if fila > self._ultima_fila and not self._terminada:
+            self._leer_hasta(max(fila, self._libro.filas))
+
+        return self._celdas.get((fila, _columna(m.group(1))), _VACIA)
+
+    def _leer_hasta(self, fila_objetivo):
+        """
+        Avanza el streaming hasta pasar `fila_objetivo` (las filas ya
+        leídas se conservan para accesos posteriores).
+        """
+        crudas = []
+        pendientes = {}
+        fila = self._ultima_fila
+        columna = 0
+
+        # Fila que quedó abierta en la lectura anterior
+        if self._fila_siguiente is not None:
+            if self._fila_siguiente > fila_objetivo:
+                return
+            fila = self._fila_siguiente
+            self._fila_siguiente = None
+
+        for evento, nodo in self._eventos:
+            tag = nodo.tag
+
+            if tag == f"{NS}row" and evento == "start":
+                r = nodo.get("r")
+                siguiente = int(r) if r else fila + 1
+                if siguiente > fila_objetivo:
+                    self._fila_siguiente = siguiente
+                    self._ultima_fila = fila_objetivo
+                    break
+                fila, columna = siguiente, 0
+
+            elif tag == f"{NS}c" and evento == "end":
+                r = nodo.get("r")
+                if r:
+                    m = _COORDENADA.match(r)
+                    if not m:
+                        raise EstructuraNoSoportada(f"referencia de celda inválida: {r}")
+                    fila, columna = int(m.group(2)), _columna(m.group(1))
+                else:
+                    columna += 1
+                crudas.append((fila, columna, nodo))
+
+            elif tag == f"{NS}row" and evento == "end":
+                self._convertir(crudas, pendientes)
+                crudas = []
+                nodo.clear()
+
+            elif tag == f"{NS}sheetData" and evento == "end":
+                self._terminada = True
+                break
+        else:
+            self._terminada = True
+
+        self._convertir(crudas, pendientes)
+
+        # Una sola pasada por sharedStrings para todas las filas leídas
+        cadenas = self._libro.cadenas(set(pendientes.values()))
+        for posicion, indice in pendientes.items():
+            self._celdas[posicion] = _Celda(cadenas[indice])
+
+        if self._terminada:
+            self._ultima_fila = max(self._ultima_fila, fila_objetivo)
+
+    def _convertir(self, crudas, pendientes):
+        """
+        Valor de cada celda como WorkSheetParser.parse_cell (data_only).
+        Las cadenas compartidas quedan en `pendientes` (posición → índice).
+        """
+        for fila, columna, nodo in crudas:
+            tipo = nodo.get("t", "n")
+            estilo = nodo.get("s")
+            estilo = int(estilo) if estilo else 0
+
+            if tipo == "inlineStr":
+                hijo = nodo.find(f"{NS}is")
+                valor = _texto(hijo) if hijo is not None else None
+            else:
+                valor = nodo.findtext(f"{NS}v", None) or None
+
+                if valor is not None:
+                    if tipo == "n":
+                        valor = float(valor) if ("." in valor or "E" in valor or "e" in valor) else int(valor)
+                        fechas, duraciones = self._libro.estilos_fecha()
+                        if estilo in fechas:
+                            try:
+                                valor = from_excel(valor, self._libro.epoch, timedelta=estilo in duraciones)
+                            except (OverflowError, ValueError):
+                                valor = "#VALUE!"
+                    elif tipo == "s":
+                        pendientes[(fila, columna)] = int(valor)
+                        continue
+                    elif tipo == "b":
+                        valor = bool(int(valor))
+                    elif tipo == "d":
+                        valor = from_ISO8601(valor)
+                    elif tipo not in ("str", "e"):
+                        raise EstructuraNoSoportada(f"tipo de celda desconocido: {tipo}")
+
+            self._celdas[(fila, columna)] = _Celda(valor)
+
+
+def abrir_xlsx(datos, filas=1):
+    """
+    `filas`: cuántas filas leer de una vez (las que se sabe que se van
+    a pedir), para no recorrer sharedStrings fila por fila.
+    """
+    return LibroXlsx(datos, filas)
@@ -1,53 +1,87 @@
+import os
+
 import pandas as pd
 import numpy as np
 from openpyxl import load_workbook
 from openpyxl.styles import Alignment, Font
 
+from components.esquema_banco import umbral_como_texto
+from components.valores_mes import a_numero
 
+# -------------------------------------------------
+# REGLAS DE VALORACIÓN (TABLA)
+# -------------------------------------------------
+# Una fila por modelo + código con su meta y operador. Agregar
+# indicadores o modelos es editar el CSV.
+RUTA_REGLAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reglas_modelo_atencion.csv")
 
-def generar_resumen_modelo_atencion(banco):
-    
-    # -------------------------------------------------
-    # CÓDIGOS DEL MODELO
-    # -------------------------------------------------
-    codigos_modelo = [
-        "IND-CTT-001","IND-CTT-002","IND-AUT-003","IND-RYC-001",
-        "IND-RYC-002","IND-PYP-027","IND-PYP-028","IND-PYP-021",
-        "IND-PYP-030","IND-CTT-003","IND-CTT-004","IND-CTT-005",
-        "IND-CTT-006","IND-CTT-007","IND-CTT-008","IND-SISPI-002",
-        "IND-SISPI-003","IND-SISPI-004","IND-GDR-001","IND-GDR-002",
-    ]
+OPERADORES = {
+    ">=": np.greater_equal,
+    ">": np.greater,
+    "<=": np.less_equal,
+    "<": np.less,
+    "=": np.equal,
+}
 
-    # -------------------------------------------------
-    # REGLAS DE VALORACIÓN
-    # -------------------------------------------------
-    reglas_indicadores = {
-        "IND-CTT-001": {"meta": 100, "op": ">="},
-        "IND-CTT-002": {"meta": 100, "op": ">="},
-        "IND-AUT-003": {"meta": 100, "op": ">="},
-
-        "IND-RYC-001": {"meta": 80, "op": ">="},
-        "IND-RYC-002": {"meta": 80, "op": ">="},
-        "IND-PYP-027": {"meta": 80, "op": ">="},
-        "IND-PYP-028": {"meta": 80, "op": ">="},
-
-        "IND-PYP-021": {"meta": 50, "op": ">"},
-
-        "IND-PYP-030": {"meta": 1, "op": ">="},
-        "IND-CTT-003": {"meta": 1, "op": ">="},
-        "IND-CTT-004": {"meta": 1, "op": ">="},
-        "IND-CTT-005": {"meta": 1, "op": ">="},
-
-        "IND-CTT-006": {"meta": 90, "op": ">="},
-        "IND-CTT-007": {"meta": 90, "op": ">="},
-        "IND-CTT-008": {"meta": 90, "op": ">="},
-        "IND-SISPI-002": {"meta": 90, "op": ">="},
-        "IND-SISPI-003": {"meta": 90, "op": ">="},
-        "IND-SISPI-004": {"meta": 90, "op": ">="},
-
-        "IND-GDR-001": {"meta": 100, "op": ">="},
-        "IND-GDR-002": {"meta": 23.75, "op": ">="},
-    }
+TRIMESTRES = {
+    "T1": ["ENE-25","FEB-25","MAR-25"],
+    "T2": ["ABR-25","MAY-25","JUN-25"],
+    "T3": ["JUL-25","AGO-25","SEPT-25"],
+    "T4": ["OCT-25","NOV-25","DIC-25"],
+}
+
+_reglas = {}
+
+
+def cargar_reglas(ruta=RUTA_REGLAS):
+    """
+    Lee (una vez por ruta) la tabla de reglas: modelo, codigo, meta, op.
+    """
+    if ruta not in _reglas:
+        reglas = pd.read_csv(ruta, dtype={"modelo": str, "codigo": str, "op": str})
+        reglas["codigo"] = reglas["codigo"].str.strip()
+        reglas["meta"] = reglas["meta"].astype("float64")
+
+        invalidos = sorted(set(reglas["op"]) - set(OPERADORES))
+        if invalidos:
+            raise ValueError(f"Operadores no soportados en {ruta}: {invalidos}")
+
+        repetidos = reglas[reglas.duplicated(["modelo", "codigo"])]
+        if not repetidos.empty:
+            raise ValueError(f"Reglas repetidas en {ruta}: {repetidos['codigo'].tolist()}")
+
+        _reglas[ruta] = reglas
+    return _reglas[ruta]
+
+
+def valorar(medicion, meta, op):
+    """
+    "Cumple" / "No cumple" para todas las filas a la vez ("" sin
+    medición o sin regla).
+    """
+    medicion = np.asarray(medicion, dtype="float64")
+    meta = np.asarray(meta, dtype="float64")
+    op = np.asarray(op, dtype=object)
+
+    cumple = np.zeros(len(medicion), dtype=bool)
+    for simbolo, comparar in OPERADORES.items():
+        filas = op == simbolo
+        if filas.any():
+            cumple[filas] = comparar(medicion[filas], meta[filas])
+
+    sin_dato = np.isnan(medicion) | np.isnan(meta)
+    return np.where(sin_dato, "", np.where(cumple, "Cumple", "No cumple")).astype(object)
+
+
+def formato_porcentaje(serie):
+    return np.where(serie.notna(), np.char.mod("%.2f%%", serie.to_numpy(dtype="float64")), "").astype(object)
+
+
+def generar_resumen_modelo_atencion(banco, modelo_reglas="ATENCION", reglas=None):
+    """
+    Hoja del Modelo de Atención. `reglas` (DataFrame modelo, codigo,
+    meta, op) por defecto sale de reglas_modelo_atencion.csv.
+    """
 
     # -------------------------------------------------
     # NORMALIZAR COLUMNAS
@@ -66,111 +100,55 @@ def generar_resumen_modelo_atencion(banco):
         raise ValueError(f"Faltan columnas: {faltantes}")
 
     # -------------------------------------------------
-    # FILTRAR MODELO
+    # FILTRAR MODELO (JOIN CON LAS REGLAS)
     # -------------------------------------------------
-    modelo = banco[
-        banco["CONSE"].astype(str).str.strip().isin(codigos_modelo)
-    ].copy()
+    if reglas is None:
+        reglas = cargar_reglas()
+    reglas = reglas.loc[reglas["modelo"] == modelo_reglas, ["codigo", "meta", "op"]]
+
+    # inner conserva el orden del banco
+    modelo = banco.assign(
+        _CODIGO=banco["CONSE"].astype(str).str.strip()
+    ).merge(
+        reglas.rename(columns={"codigo": "_CODIGO", "meta": "_META_REGLA", "op": "_OP_REGLA"}),
+        on="_CODIGO",
+        how="inner"
+    )
 
     # -------------------------------------------------
     # META
     # -------------------------------------------------
-    modelo["META"] = modelo["ACEPTABLE"].astype(str).str.strip()
+    modelo["META"] = umbral_como_texto(modelo["ACEPTABLE"]).astype(str).str.strip()
 
     modelo.loc[
         modelo["META"].isin(["", "N/A", "NA", "nan"]),
         "META"
-    ] = modelo["SATISFACTORIO"]
-
-    # -------------------------------------------------
-    # LIMPIEZA NUMÉRICA
-    # -------------------------------------------------
-    def convertir_a_numero(valor):
-
-        if pd.isna(valor):
-            return np.nan
-
-        valor = str(valor).strip()
-
-        if valor == "" or valor.upper() == "N/A":
-            return np.nan
-
-        valor = valor.replace("%", "").replace(",", ".")
-
-        try:
-            return float(valor)
-        except:
-            return np.nan
+    ] = umbral_como_texto(modelo["SATISFACTORIO"])
 
     # -------------------------------------------------
     # TRIMESTRES
     # -------------------------------------------------
-    t1 = ["ENE-25","FEB-25","MAR-25"]
-    t2 = ["ABR-25","MAY-25","JUN-25"]
-    t3 = ["JUL-25","AGO-25","SEPT-25"]
-    t4 = ["OCT-25","NOV-25","DIC-25"]
-
-    def promedio_trimestre(df, meses):
+    meses = [m for meses_t in TRIMESTRES.values() for m in meses_t if m in modelo.columns]
+    valores = modelo[meses].apply(a_numero) if meses else pd.DataFrame(index=modelo.index)
 
-        meses_existentes = [m for m in meses if m in df.columns]
-        if not meses_existentes:
-            return pd.Series(np.nan, index=df.index)
-
-        df_trim = df[meses_existentes].copy()
-
-        for col in df_trim.columns:
-            df_trim[col] = df_trim[col].apply(convertir_a_numero)
-
-        return df_trim.mean(axis=1).round(2)
-
-    modelo["T1"] = promedio_trimestre(modelo, t1)
-    modelo["T2"] = promedio_trimestre(modelo, t2)
-    modelo["T3"] = promedio_trimestre(modelo, t3)
-    modelo["T4"] = promedio_trimestre(modelo, t4)
+    for trimestre, meses_t in TRIMESTRES.items():
+        meses_existentes = [m for m in meses_t if m in valores.columns]
+        if meses_existentes:
+            modelo[trimestre] = valores[meses_existentes].mean(axis=1).round(2)
+        else:
+            modelo[trimestre] = np.nan
 
     # -------------------------------------------------
-    # VALORACIÓN
+    # VALORACIÓN (TODOS LOS TRIMESTRES, VECTORIZADO)
     # -------------------------------------------------
-    def calcular_valoracion(codigo, medicion):
-
-        if pd.isna(medicion):
-            return ""
-
-        regla = reglas_indicadores.get(codigo)
-        if not regla:
-            return ""
-
-        meta = regla["meta"]
-
-        if regla["op"] == ">=":
-            cumple = medicion >= meta
-        else:
-            cumple = medicion > meta
-
-        return "Cumple" if cumple else "No cumple"
-
-    modelo["VAL_T1"] = [
-        calcular_valoracion(c, m)
-        for c, m in zip(modelo["CONSE"], modelo["T1"])
-    ]
-    modelo["VAL_T2"] = [
-        calcular_valoracion(c, m)
-        for c, m in zip(modelo["CONSE"], modelo["T2"])
-    ]
-    modelo["VAL_T3"] = [
-        calcular_valoracion(c, m)
-        for c, m in zip(modelo["CONSE"], modelo["T3"])
-    ]
-    modelo["VAL_T4"] = [
-        calcular_valoracion(c, m)
-        for c, m in zip(modelo["CONSE"], modelo["T4"])
-    ]
+    for trimestre in TRIMESTRES:
+        modelo[f"VAL_{trimestre}"] = valorar(
+            modelo[trimestre], modelo["_META_REGLA"], modelo["_OP_REGLA"]
+        )
 
     # FORMATO %
-    for col in ["T1","T2","T3","T4"]:
-        modelo[col] = modelo[col].apply(
-            lambda x: f"{x:.2f}%" if pd.notna(x) else ""
-        )
+    for trimestre in TRIMESTRES:
+        modelo[trimestre] = formato_porcentaje(modelo[trimestre])
         
     # -------------------------------------------------
     # DATOS ANUALES (DESDE BANCO)
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+# ----------------------------
+# NORMALIZACIÓN DE TABLAS COMPLETAS
+# ----------------------------
+# Las mismas reglas de banco_drive.norm_code / clean_str y la limpieza
+# de fórmulas, aplicadas por columna en lugar de celda por celda: cada
+# columna se factoriza (pd.factorize, en C), la regla se evalúa una vez
+# por valor distinto y el resultado vuelve a las filas con indexado de
+# numpy. Cada paso cuenta las celdas que cambió.
+#
+#   - códigos: sin espacios y en mayúsculas (norm_code).
+#   - vacíos: "" o solo espacios → None (como clean_str).
+#   - fórmulas: textos que empiezan con "=" → None (evita inyección de
+#     fórmulas al escribir el Excel).
+#
+# Las columnas numéricas se omiten; en las categóricas se trabaja solo
+# sobre las categorías.
+
+# Texto libre del banco: llega de las fichas con clean_str (None si
+# vacío) y de Drive como "" (dtype=str). Se unifica al cargar.
+COLUMNAS_TEXTO_LIBRE = [
+    "INDICADOR", "PROCESO", "OBJETIVO-DESCRIPCIÓN", "FÓRMULA",
+    "FUENTE NUMERADOR", "FUENTE DENOMINADOR", "NORMA RELACIONADA",
+    "TENDENCIA", "PERIODICIDAD ANÁLISIS", "OBSERVACIONES",
+]
+
+
+def _por_valor(serie, fn):
+    """
+    Aplica `fn` a cada valor distinto (no nulo) de la serie y lo
+    expande a todas las filas. Retorna (valores nuevos, máscara de
+    celdas que cambiaron).
+    """
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    nuevos = [fn(v) for v in unicos]
+    cambia_unico = np.array([n is not v and n != v for n, v in zip(nuevos, unicos)], dtype=bool)
+
+    # Código -1 (nulo) → última posición: sin cambio
+    cambia = np.append(cambia_unico, False)[codigos]
+    tabla = np.empty(len(nuevos) + 1, dtype=object)
+    tabla[:-1] = nuevos
+    tabla[-1] = None
+    return tabla[codigos], cambia
+
+
+def _norm_code(v):
+    return str(v).strip().upper().replace(" ", "")
+
+
+def _codigos(serie):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype(object)
+
+    valores, cambia = _por_valor(serie, _norm_code)
+    cambios = int(cambia.sum())
+    if not cambios:
+        return serie, 0
+    return pd.Series(valores, index=serie.index, name=serie.name).where(serie.notna(), None), cambios
+
+
+def _anular(serie, condicion):
+    """
+    None en las celdas de texto donde `condicion(texto)` es verdadera.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = serie.cat.categories
+        quitar = [c for c in categorias if isinstance(c, str) and condicion(c)]
+        if not quitar:
+            return serie, 0
+        cambios = int(serie.isin(quitar).sum())
+        return serie.cat.remove_categories(quitar), cambios
+
+    if pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+        return serie, 0
+
+    # Un número en una columna object nunca se anula
+    _, cambia = _por_valor(serie, lambda v: None if isinstance(v, str) and condicion(v) else v)
+    cambios = int(cambia.sum())
+    if not cambios:
+        return serie, 0
+    return serie.where(~cambia, None), cambios
+
+
+def _vacios(serie):
+    return _anular(serie, lambda v: v.strip() == "")
+
+
+def _formulas(serie):
+    return _anular(serie, lambda v: v.startswith("="))
+
+
+PASOS = {
+    "códigos": _codigos,
+    "vacíos": _vacios,
+    "fórmulas": _formulas,
+}
+
+
+def normalizar(df, codigos=(), vacios=(), formulas=(), nombre="datos"):
+    """
+    Aplica los pasos a las columnas indicadas (las que no existan se
+    ignoran) y retorna (df, cambios), con
+    cambios = {paso: {columna: celdas cambiadas}} (solo las > 0).
+    """
+    cambios = {}
+
+    for paso, columnas in (("códigos", codigos), ("vacíos", vacios), ("fórmulas", formulas)):
+        for col in columnas:
+            if col not in df.columns:
+                continue
+            df[col], n = PASOS[paso](df[col])
+            if n:
+                cambios.setdefault(paso, {})[col] = n
+
+    for paso, por_columna in cambios.items():
+        detalle = ", ".join(f"{col}: {n}" for col, n in por_columna.items())
+        print(f"🧹 Normalización {nombre} ({paso}): {detalle}")
+
+    return df, cambios
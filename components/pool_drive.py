@@ -0,0 +1,115 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+import google.auth.credentials
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+from googleapiclient.http import DEFAULT_HTTP_TIMEOUT_SEC
+
+from components.telemetria import registrar_conexion
+
+# ----------------------------
+# POOL DE CLIENTES DE DRIVE
+# ----------------------------
+# httplib2 no es thread-safe: cada cliente (servicio de la API) tiene su
+# propio transporte HTTP y lo usa un solo hilo a la vez. Los clientes se
+# piden y se devuelven al pool, así sus conexiones keep-alive se
+# reutilizan entre tareas (y entre hilos de distintos ThreadPoolExecutor)
+# en vez de abrir una nueva por hilo.
+#
+# Todos comparten unas credenciales con renovación del token
+# centralizada: un solo hilo lo renueva y los demás usan el nuevo.
+
+
+class CredencialesCentrales(google.auth.credentials.Credentials):
+    """
+    Envoltura de las credenciales de la cuenta de servicio que
+    serializa la renovación del token.
+    """
+
+    def __init__(self, base):
+        super().__init__()
+        self._base = base
+        self._lock = threading.Lock()
+        self.renovaciones = 0
+
+    def refresh(self, request):
+        visto = self.token
+        with self._lock:
+            # Otro hilo lo renovó mientras se esperaba el lock
+            if self.token is not visto and self.valid:
+                return
+
+            self._base.refresh(request)
+            self.token = self._base.token
+            self.expiry = self._base.expiry
+            self.renovaciones += 1
+
+        print("🔑 Token de Drive renovado")
+
+
+class HttpContado(httplib2.Http):
+    """
+    httplib2.Http que informa si cada petición abre una conexión o
+    reutiliza una ya abierta (keep-alive).
+    """
+
+    def _conn_request(self, conn, request_uri, method, body, headers):
+        registrar_conexion(reutilizada=conn.sock is not None)
+        return super()._conn_request(conn, request_uri, method, body, headers)
+
+
+def _http_contado():
+    # Igual que googleapiclient.http.build_http
+    http = HttpContado(timeout=DEFAULT_HTTP_TIMEOUT_SEC)
+    # Drive usa 308 en subidas reanudables, no como redirección
+    http.redirect_codes = http.redirect_codes - {308}
+    return http
+
+
+class PoolClientes:
+    """
+    Clientes de la API de Drive reutilizables. `tomar` entrega uno libre
+    (o crea uno nuevo) y `devolver` lo deja para la siguiente tarea.
+    """
+
+    def __init__(self, credenciales):
+        self.credenciales = CredencialesCentrales(credenciales)
+        # LIFO: primero los clientes usados hace menos (conexión viva)
+        self._libres = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.creados = 0
+
+    def _nuevo(self):
+        http = AuthorizedHttp(self.credenciales, http=_http_contado())
+        # Documento de descubrimiento incluido en la librería (sin red)
+        cliente = build("drive", "v3", http=http, static_discovery=True)
+        with self._lock:
+            self.creados += 1
+        return cliente
+
+    def tomar(self):
+        try:
+            return self._libres.get_nowait()
+        except queue.Empty:
+            return self._nuevo()
+
+    def devolver(self, cliente):
+        self._libres.put(cliente)
+
+    @contextmanager
+    def cliente(self):
+        cliente = self.tomar()
+        try:
+            yield cliente
+        finally:
+            self.devolver(cliente)
+
+    def precalentar(self):
+        """
+        Deja un cliente creado en el pool.
+        """
+        if self._libres.empty():
+            self.devolver(self._nuevo())
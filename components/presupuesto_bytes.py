@@ -0,0 +1,45 @@
+import threading
+
+# ----------------------------
+# PRESUPUESTO GLOBAL DE BYTES EN VUELO
+# ----------------------------
+# Acota cuántos bytes hay descargados o descargándose y aún sin
+# consumir. La reserva se hace al enviar cada descarga y se libera
+# cuando quien la usa terminó con el stream (ver descargar_fichas).
+#
+# No bloquea: quien envía las descargas es el mismo hilo que las
+# consume, así que esperar ahí sería esperarse a sí mismo. Si no cabe,
+# simplemente no se envía otra hasta que se libere algo. Si no hay nada
+# en vuelo, la reserva pasa aunque supere el límite (un archivo más
+# grande que el presupuesto igual se descarga, solo).
+
+
+class PresupuestoBytes:
+    """
+    `intentar_reservar(n)` → True si `n` bytes caben en `limite`.
+    """
+
+    def __init__(self, limite):
+        self.limite = limite
+        self.en_vuelo = 0
+        self.pico = 0
+        self.esperas = 0
+        self._lock = threading.Lock()
+
+    def intentar_reservar(self, n, forzar=False):
+        """
+        `forzar`: reservar aunque no quepa (quien llama no tiene nada
+        en vuelo y sin esta descarga no avanzaría).
+        """
+        with self._lock:
+            if not forzar and self.en_vuelo and self.en_vuelo + n > self.limite:
+                self.esperas += 1
+                return False
+
+            self.en_vuelo += n
+            self.pico = max(self.pico, self.en_vuelo)
+            return True
+
+    def liberar(self, n):
+        with self._lock:
+            self.en_vuelo -= n
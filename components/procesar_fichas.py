@@ -1,6 +1,444 @@
+import io
+from collections import deque
+from contextlib import closing
+
+import numpy as np
 import pandas as pd
 from openpyxl import load_workbook
-import re
+
+from components.lector_xlsx import abrir_xlsx
+from components.esquema_banco import aplicar_esquema
+from components.valores_mes import COL_UNIDAD, UNIDAD_NUMERO, UNIDAD_PORCENTAJE
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Subir cuando cambie la lógica de extraer_ficha: invalida la cache local
+VERSION_EXTRACCION = 3
+
+
+# ----------------------------
+# DESCARGA CONCURRENTE
+# ----------------------------
+# Lo que se reserva del presupuesto por una ficha sin `size` en el
+# listado (Google Sheets que se exportan, accesos directos)
+TAMANO_FICHA_DESCONOCIDO = 1024 * 1024
+
+
+def _tamano(f):
+    return int(f.get("size") or TAMANO_FICHA_DESCONOCIDO)
+
+
+def descargar_fichas(files, read_excel_from_drive, max_workers=8, presupuesto=None):
+    """
+    Descarga las fichas con un pool acotado de hilos.
+
+    Cada ficha se pasa como `metadata` para que la descarga no tenga
+    que volver a consultar su tipo. Retorna un generador de
+    (ficha, stream, error) en el mismo orden de `files`, sin importar
+    el orden en que terminen.
+
+    Se envían a lo sumo `max_workers * 2` descargas por delante de la
+    que se está consumiendo (ventana deslizante) y, con `presupuesto`
+    (PresupuestoBytes), solo mientras sus tamaños quepan en él. Cada
+    stream se cierra y su reserva se libera cuando el consumidor pide
+    la siguiente ficha (ya terminó de usarlo).
+    """
+
+    def descargar(f):
+        try:
+            return read_excel_from_drive(f["id"], metadata=f), None
+        except Exception as e:
+            return None, e
+
+    max_workers = max(1, max_workers)
+    ventana = max_workers * 2
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pendientes = deque(files)
+        en_vuelo = deque()
+
+        def rellenar():
+            while pendientes and len(en_vuelo) < ventana:
+                f = pendientes[0]
+                # Sin nada en vuelo se envía igual (si no, no avanzaría)
+                if presupuesto and not presupuesto.intentar_reservar(_tamano(f), forzar=not en_vuelo):
+                    break
+                pendientes.popleft()
+                en_vuelo.append((f, pool.submit(descargar, f)))
+
+        try:
+            rellenar()
+            while en_vuelo:
+                f, futuro = en_vuelo.popleft()
+                stream, error = futuro.result()
+
+                try:
+                    yield f, stream, error
+                finally:
+                    if stream is not None:
+                        stream.close()
+                    if presupuesto:
+                        presupuesto.liberar(_tamano(f))
+
+                rellenar()
+        finally:
+            # Consumo interrumpido: se cancelan las que no empezaron y se
+            # liberan las que quedaron enviadas
+            for f, futuro in en_vuelo:
+                futuro.cancel()
+                if presupuesto:
+                    presupuesto.liberar(_tamano(f))
+
+
+# ----------------------------
+# EXTRAER DATOS DE UNA FICHA
+# ----------------------------
+def extraer_ficha(wb, filename, col_codigo, clean_str, norm_code):
+    """
+    Extrae la fila del banco desde el workbook de una ficha.
+
+    Retorna:
+        nombre de la hoja
+        código (None si no se encontró)
+        fila (dict columna → valor)
+    """
+
+    nombre_base = filename.lower().replace(".xlsx", "").replace(".xlsm", "")
+
+    # ----------------------------
+    # Buscar hoja principal
+    # ----------------------------
+    posibles_codigos = [p for p in nombre_base.split() if "ind" in p and "-" in p]
+    nombre_hoja = None
+
+    for hoja in wb.sheetnames:
+        hoja_l = hoja.lower()
+        if any(c in hoja_l for c in posibles_codigos):
+            nombre_hoja = hoja
+            break
+        if nombre_base in hoja_l:
+            nombre_hoja = hoja
+            break
+
+    if not nombre_hoja:
+        nombre_hoja = next(
+            (h for h in wb.sheetnames if "ficha" in h.lower() or "indicador" in h.lower()),
+            wb.sheetnames[0]
+        )
+
+    ws = wb[nombre_hoja]
+
+    # ----------------------------
+    # Extraer código
+    # ----------------------------
+    # Obtener código directamente desde la celda correcta
+    codigo = ws["L5"].value or ws["M5"].value
+
+    # Normalizar si existe valor
+    if codigo:
+        codigo = norm_code(codigo)
+
+    # Validar que realmente sea un código válido
+    if not codigo or not str(codigo).startswith("IND-"):
+        codigo = None
+
+
+    # ----------------------------
+    # Validar código
+    # ----------------------------
+    if not codigo:
+        return nombre_hoja, None, None
+
+
+    # ----------------------------
+    # Datos principales
+    # ----------------------------
+    fila = {
+        col_codigo: codigo,
+        "INDICADOR": clean_str(ws["C5"].value),
+        "JERARQUÍA": clean_str(ws["I5"].value),
+        "PROCESO": clean_str(ws["H7"].value),
+        "OBJETIVO-DESCRIPCIÓN": clean_str(ws["C6"].value),
+        "ÁREA": clean_str(ws["C7"].value),
+        "TIPO DE INDICADOR": clean_str(ws["C8"].value),
+        "TENDENCIA": clean_str(ws["L8"].value),
+        "FÓRMULA": f"{clean_str(ws['C9'].value)} / {clean_str(ws['H9'].value)}",
+        "FUENTE NUMERADOR": clean_str(ws["C10"].value),
+        "FUENTE DENOMINADOR": clean_str(ws["H10"].value),
+        "PERIODICIDAD MEDICION": clean_str(ws["C11"].value),
+        "PERIODICIDAD ANÁLISIS": clean_str(ws["C12"].value),
+        "OBSERVACIONES": clean_str(ws["C13"].value),
+        "NORMA RELACIONADA": clean_str(ws["L9"].value),
+        "Critico": clean_str(ws["K11"].value),
+        "Aceptable": clean_str(ws["L11"].value),
+        "Satisfactorio": clean_str(ws["M11"].value),
+        "VALORACIÓN": clean_str(ws["O19"].value),
+        "RANGO DE GESTION": clean_str(ws["P19"].value)
+    }
+
+    # ----------------------------
+    # Meses (float, NaN sin dato; el formato se aplica al renderizar
+    # con la unidad de cada mes, ver valores_mes)
+    # ----------------------------
+    mapa_meses = {
+        "ene-25": "B19", "feb-25": "C19", "mar-25": "D19", "abr-25": "E19",
+        "may-25": "F19", "jun-25": "G19", "jul-25": "H19", "ago-25": "I19",
+        "sept-25": "J19", "oct-25": "K19", "nov-25": "L19", "dic-25": "M19"
+    }
+
+    valores = []
+    valores_limpios = []
+    unidades = []
+    es_porcentaje = False
+
+    for mes, celda in mapa_meses.items():
+        v = ws[celda].value
+
+        if v is None or str(v).strip() == "" or "N/A" in str(v) or "#" in str(v):
+            fila[mes] = np.nan
+            valores.append(None)
+            unidades.append(UNIDAD_PORCENTAJE if es_porcentaje else UNIDAD_NUMERO)
+            continue
+
+        try:
+            # Si viene como texto con %
+            if isinstance(v, str) and "%" in v:
+                num = float(v.replace("%", "").replace(",", "."))
+                es_porcentaje = True
+            else:
+                num = float(v)
+
+                # Si viene como decimal tipo 0.85 → es porcentaje Excel
+                if 0 < num <= 1:
+                    num = num * 100
+                    es_porcentaje = True
+
+            valores.append(num)
+            valores_limpios.append(num)
+
+            fila[mes] = round(num, 2)
+
+        except:
+            fila[mes] = np.nan
+            valores.append(None)
+
+        # Porcentaje desde el primer mes que lo fue (los anteriores no cambian)
+        unidades.append(UNIDAD_PORCENTAJE if es_porcentaje else UNIDAD_NUMERO)
+
+    fila[COL_UNIDAD] = "".join(unidades)
+
+    # ----------------------------
+    # VALOR ANUAL desde Excel (N19)
+    # ----------------------------
+    v_anual = ws["N19"].value
+
+    if v_anual is None or str(v_anual).strip() == "" or "N/A" in str(v_anual) or "#" in str(v_anual):
+        fila["VALOR ANUAL"] = ""
+    else:
+        try:
+            if isinstance(v_anual, str) and "%" in v_anual:
+                num = float(v_anual.replace("%", "").replace(",", "."))
+                fila["VALOR ANUAL"] = f"{round(num)}%"
+
+            else:
+                num = float(v_anual)
+
+                if es_porcentaje:
+                    if 0 < num <= 1:
+                        num = num * 100
+
+                    fila["VALOR ANUAL"] = f"{round(num)}%"
+                else:
+                    fila["VALOR ANUAL"] = round(num, 2)
+
+        except:
+            fila["VALOR ANUAL"] = ""
+
+
+    # ----------------------------
+    # Hoja evaluación
+    # ----------------------------
+    hoja_eval = next((wb[h] for h in wb.sheetnames if "eval" in h.lower()), None)
+    if hoja_eval:
+        fila.update({
+            "ESTADO DEL INDICADOR": clean_str(hoja_eval["A2"].value),
+            "ORIGEN": clean_str(hoja_eval["B2"].value),
+            "DOCUMENTADO": clean_str(hoja_eval["C2"].value),
+            "DE SEG CONTRACTUAL": clean_str(hoja_eval["D2"].value),
+            "REVISADOS": clean_str(hoja_eval["E2"].value),
+        })
+
+    return nombre_hoja, codigo, fila
+
+
+# ----------------------------
+# PARSEO (EN ESTE PROCESO O EN UN POOL DE PROCESOS)
+# ----------------------------
+# Por debajo de esto por proceso, arrancar workers cuesta más de lo que ahorra
+MIN_FICHAS_POR_PROCESO = 50
+
+# Última fila que lee extraer_ficha (meses, valor anual y valoración)
+ULTIMA_FILA_FICHA = 19
+
+
+def parsear_ficha(datos, filename, col_codigo, clean_str, norm_code):
+    """
+    Abre y extrae una ficha. Es de nivel de módulo para poder enviarse
+    a otro proceso; `datos` son los bytes del xlsx o un stream.
+
+    Primero con el lector directo del zip (solo las celdas necesarias);
+    si la estructura no es la esperada, con openpyxl.
+    """
+    if isinstance(datos, bytes):
+        datos = io.BytesIO(datos)
+
+    try:
+        wb = abrir_xlsx(datos, filas=ULTIMA_FILA_FICHA)
+        return extraer_ficha(wb, filename, col_codigo, clean_str, norm_code)
+    except Exception:
+        datos.seek(0)
+
+    wb = load_workbook(datos, data_only=True, read_only=True)
+    return extraer_ficha(wb, filename, col_codigo, clean_str, norm_code)
+
+
+def _bytes_de(stream):
+    stream.seek(0)
+    return stream.read()
+
+
+def extraer_fichas(descargas, col_codigo, clean_str, norm_code, procesos=1, total=None, presupuesto=None):
+    """
+    Parsea lo que llega de descargar_fichas.
+
+    Con `procesos` > 1 los bytes de cada ficha se envían a un pool de
+    procesos (el parseo es CPU puro y con hilos no escala por el GIL);
+    se mantienen a lo sumo unas pocas fichas por proceso en vuelo. Con
+    `presupuesto` (el mismo de descargar_fichas) esos bytes también
+    cuentan hasta que el proceso devuelve la ficha: si no caben, primero
+    se entregan resultados pendientes.
+
+    Retorna un generador de (ficha, (hoja, código, fila), error) en el
+    mismo orden de las descargas.
+    """
+
+    if total is not None:
+        procesos = min(procesos, total // MIN_FICHAS_POR_PROCESO)
+
+    if procesos <= 1:
+        for f, stream, error in descargas:
+            if error:
+                yield f, None, error
+                continue
+            try:
+                yield f, parsear_ficha(stream, f["name"], col_codigo, clean_str, norm_code), None
+            except Exception as e:
+                yield f, None, e
+        return
+
+    def resultado(f, futuro, error, tamano):
+        if error:
+            return f, None, error
+        error = futuro.exception()
+        if presupuesto:
+            presupuesto.liberar(tamano)
+        return (f, None, error) if error else (f, futuro.result(), None)
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        en_vuelo = deque()
+
+        try:
+            for f, stream, error in descargas:
+                futuro = None
+                tamano = 0
+                if not error:
+                    datos = _bytes_de(stream)
+                    tamano = len(datos)
+                    # Sin nada en el pool se envía igual (si no, no avanzaría)
+                    while presupuesto and not presupuesto.intentar_reservar(tamano, forzar=not en_vuelo):
+                        yield resultado(*en_vuelo.popleft())
+
+                    futuro = pool.submit(parsear_ficha, datos, f["name"], col_codigo, clean_str, norm_code)
+                en_vuelo.append((f, futuro, error, tamano))
+
+                if len(en_vuelo) >= procesos * 4:
+                    yield resultado(*en_vuelo.popleft())
+
+            while en_vuelo:
+                yield resultado(*en_vuelo.popleft())
+        finally:
+            # Consumo interrumpido: lo que quedó en el pool ya no cuenta
+            for f, futuro, error, tamano in en_vuelo:
+                if futuro:
+                    futuro.cancel()
+                if presupuesto and tamano:
+                    presupuesto.liberar(tamano)
+
+
+# ----------------------------
+# UPSERT DEL BANCO
+# ----------------------------
+def aplicar_filas_banco(banco, filas, col_codigo):
+    """
+    Aplica en un solo paso las filas extraídas sobre el banco.
+
+    Las filas se fusionan por código en el orden recibido (la última
+    ficha gana campo a campo, como el proceso secuencial), se actualizan
+    los códigos existentes columna por columna y los nuevos se agregan
+    con un único concat.
+    """
+
+    if not filas:
+        return banco
+
+    # Buffer columnar: código → campos fusionados
+    buffer = {}
+    for fila in filas:
+        buffer.setdefault(fila[col_codigo], {}).update(fila)
+
+    codigos = pd.Index(list(buffer))
+    columnas = [c for c in banco.columns if c != col_codigo]
+    ausente = object()
+
+    # ----------------------------
+    # Actualizar existentes
+    # ----------------------------
+    existentes = banco[col_codigo].isin(codigos)
+
+    if existentes.any():
+        filas_banco = banco.index[existentes.to_numpy()]
+        posiciones = codigos.get_indexer(banco.loc[existentes, col_codigo])
+
+        for col in columnas:
+            valores = np.array([d.get(col, ausente) for d in buffer.values()], dtype=object)[posiciones]
+            presentes = np.array([v is not ausente for v in valores], dtype=bool)
+
+            if presentes.any():
+                nuevos_valores = valores[presentes]
+                if pd.api.types.is_float_dtype(banco[col]):
+                    try:
+                        nuevos_valores = nuevos_valores.astype("float64")
+                    except (TypeError, ValueError):
+                        # Umbral numérico en el banco y texto en la ficha
+                        banco[col] = banco[col].astype(object)
+                elif isinstance(banco[col].dtype, pd.CategoricalDtype):
+                    # Los valores de las fichas pueden no estar entre las categorías
+                    banco[col] = banco[col].astype(object)
+                banco.loc[filas_banco[presentes], col] = nuevos_valores
+
+    # ----------------------------
+    # Agregar nuevos
+    # ----------------------------
+    ya_en_banco = set(banco.loc[existentes, col_codigo])
+    nuevos = [c for c in codigos if c not in ya_en_banco]
+
+    if nuevos:
+        df_nuevos = pd.DataFrame(
+            [{**{c: None for c in banco.columns}, **buffer[c]} for c in nuevos],
+            columns=banco.columns
+        )
+        banco = pd.concat([banco, df_nuevos], ignore_index=True)
+
+    return banco
 
 
 def procesar_fichas_drive(
@@ -9,11 +447,22 @@ def procesar_fichas_drive(
     col_codigo,
     read_excel_from_drive,
     clean_str,
-    norm_code
+    norm_code,
+    max_workers=8,
+    cache=None,
+    procesos=1,
+    presupuesto=None
 ):
     """
     Procesa las fichas del año y actualiza el banco.
 
+    Las descargas se hacen en paralelo (`max_workers` hilos, acotadas
+    por `presupuesto`, ver descargar_fichas); la extracción y el log se
+    mantienen en el orden de `files_anio`.
+    Con `cache` (CacheFichas), las fichas sin cambios en Drive no se
+    descargan ni se vuelven a leer. Con `procesos` > 1 el parseo se
+    reparte en un pool de procesos.
+
     Retorna:
         banco actualizado
         registros (log)
@@ -24,228 +473,128 @@ def procesar_fichas_drive(
     if "RANGO DE GESTION" not in banco.columns:
         banco["RANGO DE GESTION"] = None
 
-    for f in files_anio:
-        filename = f["name"]
-        file_id = f["id"]
-
-        if not filename.lower().endswith((".xlsx", ".xlsm")):
-            continue
-
-        try:
-            stream = read_excel_from_drive(file_id)
-            wb = load_workbook(stream, data_only=True, read_only=True)
-            nombre_base = filename.lower().replace(".xlsx", "").replace(".xlsm", "")
-
-            # ----------------------------
-            # Buscar hoja principal
-            # ----------------------------
-            posibles_codigos = [p for p in nombre_base.split() if "ind" in p and "-" in p]
-            nombre_hoja = None
-
-            for hoja in wb.sheetnames:
-                hoja_l = hoja.lower()
-                if any(c in hoja_l for c in posibles_codigos):
-                    nombre_hoja = hoja
-                    break
-                if nombre_base in hoja_l:
-                    nombre_hoja = hoja
-                    break
-
-            if not nombre_hoja:
-                nombre_hoja = next(
-                    (h for h in wb.sheetnames if "ficha" in h.lower() or "indicador" in h.lower()),
-                    wb.sheetnames[0]
-                )
-
-            ws = wb[nombre_hoja]
-
-            # ----------------------------
-            # Extraer código
-            # ----------------------------
-            # Obtener código directamente desde la celda correcta
-            codigo = ws["L5"].value or ws["M5"].value
+    # Meses como matriz float64 + unidad por mes
+    banco = aplicar_esquema(banco)
+
+    columnas_banco = set(banco.columns)
+    codigos_banco = set(banco[col_codigo].dropna())
+    filas = []
+
+    fichas = [
+        f for f in files_anio
+        if f["name"].lower().endswith((".xlsx", ".xlsm"))
+    ]
+
+    # ----------------------------
+    # Consultar cache antes de descargar
+    # ----------------------------
+    en_cache = [cache.obtener(f) if cache else None for f in fichas]
+
+    pendientes = [f for f, e in zip(fichas, en_cache) if e is None]
+    descargas = descargar_fichas(pendientes, read_excel_from_drive, max_workers, presupuesto)
+    extraidas = extraer_fichas(
+        descargas,
+        col_codigo,
+        clean_str,
+        norm_code,
+        procesos=procesos,
+        total=len(pendientes),
+        presupuesto=presupuesto
+    )
+
+    # Cerrar los generadores apaga los pools de hilos y de procesos
+    # también si el ciclo se interrumpe
+    with closing(descargas), closing(extraidas):
+        for f, entrada in zip(fichas, en_cache):
+            filename = f["name"]
+            estado_cache = "hit" if entrada else "miss"
+
+            try:
+                if entrada:
+                    nombre_hoja = entrada["hoja"]
+                    codigo = entrada["codigo"]
+                    fila = entrada["fila"]
+                else:
+                    _, extraida, error = next(extraidas)
+                    if error:
+                        raise error
+
+                    nombre_hoja, codigo, fila = extraida
+
+                    if cache:
+                        cache.guardar(f, nombre_hoja, codigo, fila)
+
+                # ----------------------------
+                # Validar código
+                # ----------------------------
+                if not codigo:
+                    registros.append({
+                        "archivo": filename,
+                        "hoja": nombre_hoja,
+                        "codigo": None,
+                        "accion": "codigo_no_encontrado",
+                        "ok": False,
+                        "cache": estado_cache
+                    })
+                    continue
 
-            # Normalizar si existe valor
-            if codigo:
-                codigo = norm_code(codigo)
+                # Mantener solo columnas válidas
+                fila = {k: v for k, v in fila.items() if k in columnas_banco}
 
-            # Validar que realmente sea un código válido
-            if not codigo or not str(codigo).startswith("IND-"):
-                codigo = None
+                # ----------------------------
+                # Acumular para el upsert
+                # ----------------------------
+                if codigo in codigos_banco:
+                    accion = "actualizado"
+                else:
+                    codigos_banco.add(codigo)
+                    accion = "agregado"
 
+                filas.append(fila)
 
-            # ----------------------------
-            # Validar código
-            # ----------------------------
-            if not codigo:
                 registros.append({
                     "archivo": filename,
                     "hoja": nombre_hoja,
-                    "codigo": None,
-                    "accion": "codigo_no_encontrado",
-                    "ok": False
+                    "codigo": codigo,
+                    "accion": accion,
+                    "ok": True,
+                    "cache": estado_cache
                 })
-                continue
-
-
-            # ----------------------------
-            # Datos principales
-            # ----------------------------
-            fila = {
-                col_codigo: codigo,
-                "INDICADOR": clean_str(ws["C5"].value),
-                "JERARQUÍA": clean_str(ws["I5"].value),
-                "PROCESO": clean_str(ws["H7"].value),
-                "OBJETIVO-DESCRIPCIÓN": clean_str(ws["C6"].value),
-                "ÁREA": clean_str(ws["C7"].value),
-                "TIPO DE INDICADOR": clean_str(ws["C8"].value),
-                "TENDENCIA": clean_str(ws["L8"].value),
-                "FÓRMULA": f"{clean_str(ws['C9'].value)} / {clean_str(ws['H9'].value)}",
-                "FUENTE NUMERADOR": clean_str(ws["C10"].value),
-                "FUENTE DENOMINADOR": clean_str(ws["H10"].value),
-                "PERIODICIDAD MEDICION": clean_str(ws["C11"].value),
-                "PERIODICIDAD ANÁLISIS": clean_str(ws["C12"].value),
-                "OBSERVACIONES": clean_str(ws["C13"].value),
-                "NORMA RELACIONADA": clean_str(ws["L9"].value),
-                "Critico": clean_str(ws["K11"].value),
-                "Aceptable": clean_str(ws["L11"].value),
-                "Satisfactorio": clean_str(ws["M11"].value),
-                "VALORACIÓN": clean_str(ws["O19"].value),
-                "RANGO DE GESTION": clean_str(ws["P19"].value)
-            }
-
-            # ----------------------------
-            # Meses
-            # ----------------------------
-            mapa_meses = {
-                "ene-25": "B19", "feb-25": "C19", "mar-25": "D19", "abr-25": "E19",
-                "may-25": "F19", "jun-25": "G19", "jul-25": "H19", "ago-25": "I19",
-                "sept-25": "J19", "oct-25": "K19", "nov-25": "L19", "dic-25": "M19"
-            }
-
-            valores = []
-            valores_limpios = []
-            es_porcentaje = False
-
-            for mes, celda in mapa_meses.items():
-                v = ws[celda].value
-
-                if v is None or str(v).strip() == "" or "N/A" in str(v) or "#" in str(v):
-                    fila[mes] = "N/A"
-                    valores.append(None)
-                    continue
 
-                try:
-                    # Si viene como texto con %
-                    if isinstance(v, str) and "%" in v:
-                        num = float(v.replace("%", "").replace(",", "."))
-                        es_porcentaje = True
-                    else:
-                        num = float(v)
-
-                        # Si viene como decimal tipo 0.85 → es porcentaje Excel
-                        if 0 < num <= 1:
-                            num = num * 100
-                            es_porcentaje = True
-
-                    valores.append(num)
-                    valores_limpios.append(num)
-
-                    # Guardar formateado respetando tipo
-                    if es_porcentaje:
-                        fila[mes] = f"{num:.2f}%"
-                    else:
-                        fila[mes] = round(num, 2)
-
-                except:
-                    fila[mes] = "N/A"
-                    valores.append(None)
-
-            # ----------------------------
-            # VALOR ANUAL desde Excel (N19)
-            # ----------------------------
-            v_anual = ws["N19"].value
-
-            if v_anual is None or str(v_anual).strip() == "" or "N/A" in str(v_anual) or "#" in str(v_anual):
-                fila["VALOR ANUAL"] = ""
-            else:
-                try:
-                    if isinstance(v_anual, str) and "%" in v_anual:
-                        num = float(v_anual.replace("%", "").replace(",", "."))
-                        fila["VALOR ANUAL"] = f"{round(num)}%"
-
-                    else:
-                        num = float(v_anual)
-
-                        if es_porcentaje:
-                            if 0 < num <= 1:
-                                num = num * 100
-
-                            fila["VALOR ANUAL"] = f"{round(num)}%"
-                        else:
-                            fila["VALOR ANUAL"] = round(num, 2)
-
-                except:
-                    fila["VALOR ANUAL"] = ""
-
-
-            # ----------------------------
-            # Hoja evaluación
-            # ----------------------------
-            hoja_eval = next((wb[h] for h in wb.sheetnames if "eval" in h.lower()), None)
-            if hoja_eval:
-                fila.update({
-                    "ESTADO DEL INDICADOR": clean_str(hoja_eval["A2"].value),
-                    "ORIGEN": clean_str(hoja_eval["B2"].value),
-                    "DOCUMENTADO": clean_str(hoja_eval["C2"].value),
-                    "DE SEG CONTRACTUAL": clean_str(hoja_eval["D2"].value),
-                    "REVISADOS": clean_str(hoja_eval["E2"].value),
+            except Exception as e:
+                registros.append({
+                    "archivo": filename,
+                    "hoja": None,
+                    "codigo": None,
+                    "accion": f"error: {e}",
+                    "ok": False,
+                    "cache": estado_cache
                 })
 
-            # Mantener solo columnas válidas
-            fila = {k: v for k, v in fila.items() if k in banco.columns}
+    if cache:
+        cache.persistir()
+        print(f"🗃 Cache de fichas: {cache.hits} hits / {cache.misses} misses")
 
-            # ----------------------------
-            # Actualizar banco
-            # ----------------------------
-            if codigo in banco[col_codigo].values:
-                for k, v in fila.items():
-                    banco.loc[banco[col_codigo] == codigo, k] = v
-                accion = "actualizado"
-            else:
-                nueva = {c: None for c in banco.columns}
-                nueva.update(fila)
-                banco = pd.concat([banco, pd.DataFrame([nueva])], ignore_index=True)
-                accion = "agregado"
-
-            registros.append({
-                "archivo": filename,
-                "hoja": nombre_hoja,
-                "codigo": codigo,
-                "accion": accion,
-                "ok": True
-            })
-
-        except Exception as e:
-            registros.append({
-                "archivo": filename,
-                "hoja": None,
-                "codigo": None,
-                "accion": f"error: {e}",
-                "ok": False
-            })
     # ============================
-    # ORDENAR BANCO
+    # ACTUALIZAR BANCO
     # ============================
+    banco = aplicar_filas_banco(banco, filas, col_codigo)
 
+    # El upsert puede dejar columnas como object: volver a tipar
+    banco = aplicar_esquema(banco)
 
-    def extraer_numero_codigo(codigo):
-        if pd.isna(codigo):
-            return 0
-        match = re.search(r'(\d+)$', str(codigo))
-        return int(match.group(1)) if match else 0
+    # ============================
+    # ORDENAR BANCO
+    # ============================
 
-    banco["_orden"] = banco[col_codigo].apply(extraer_numero_codigo)
+    # Número final del código (IND-XXX-012 → 12); sin número → 0
+    banco["_orden"] = (
+        banco[col_codigo]
+        .astype(str)
+        .str.extract(r"(\d+)$", expand=False)
+        .fillna("0")
+        .astype("int64")
+    )
 
     banco = banco.sort_values(by=["ÁREA", "_orden"])
 
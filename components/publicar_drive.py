@@ -0,0 +1,91 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from components.salida_determinista import md5_bytes
+
+
+# ----------------------------
+# PUBLICAR ARCHIVOS EN PARALELO
+# ----------------------------
+def sin_cambios(tarea, get_file_metadata):
+    """
+    True si el archivo destino ya existe en Drive con el mismo md5 que
+    los bytes a subir. Ante cualquier duda (sin id, sin md5, error al
+    consultar) se sube.
+
+    Si la tarea trae `propiedades["md5_contenido"]` (archivos con una
+    parte propia de cada ejecución, como la hoja Tiempos) se compara
+    ese md5 con el publicado, siempre que el archivo de Drive siga
+    siendo el que se publicó (su md5Checksum igual a la propiedad md5).
+    """
+    if not (get_file_metadata and tarea.get("file_id")):
+        return False
+
+    try:
+        remoto = get_file_metadata(tarea["file_id"])
+    except Exception:
+        return False
+
+    contenido = (tarea.get("propiedades") or {}).get("md5_contenido")
+    if contenido:
+        publicadas = remoto.get("appProperties") or {}
+        return (
+            publicadas.get("md5_contenido") == contenido
+            and publicadas.get("md5") == remoto.get("md5Checksum")
+        )
+
+    return remoto.get("md5Checksum") == md5_bytes(tarea["bytes_data"])
+
+
+def publicar_archivos(tareas, create_or_update_file, max_workers=4, get_file_metadata=None):
+    """
+    Sube en paralelo archivos independientes.
+
+    tareas: lista de dicts con los argumentos de create_or_update_file
+    (bytes_data, file_id, filename, parent_folder_id y opcionales
+    mimetype y propiedades).
+
+    Con `get_file_metadata` se omiten los archivos cuyo md5Checksum en
+    Drive coincide con el de los bytes locales (0 bytes enviados).
+
+    Retorna una lista (en el orden de `tareas`) con la latencia y los
+    bytes enviados de cada archivo. Si alguna subida falla, se esperan
+    las demás y luego se relanza el primer error.
+    """
+
+    def subir(tarea):
+        inicio = time.perf_counter()
+        omitido = sin_cambios(tarea, get_file_metadata)
+        if not omitido:
+            create_or_update_file(**tarea)
+        return {
+            "archivo": tarea["filename"],
+            "segundos": round(time.perf_counter() - inicio, 3),
+            "bytes": 0 if omitido else len(tarea["bytes_data"]),
+            "omitido": omitido
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futuros = [pool.submit(subir, t) for t in tareas]
+
+    resultados = []
+    errores = []
+    for tarea, futuro in zip(tareas, futuros):
+        error = futuro.exception()
+        if error:
+            print(f"❌ Falló la subida de {tarea['filename']}: {error}")
+            errores.append(error)
+        else:
+            resultados.append(futuro.result())
+
+    print("\n📤 Publicación:")
+    for r in resultados:
+        if r["omitido"]:
+            print(f"   {r['archivo']}: sin cambios, no se sube")
+        else:
+            print(f"   {r['archivo']}: {r['bytes'] / 1024:.1f} KB en {r['segundos']:.2f}s")
+
+    if errores:
+        raise errores[0]
+
+    return resultados
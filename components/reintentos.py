@@ -0,0 +1,65 @@
+import http.client
+import random
+import socket
+import time
+
+from googleapiclient.errors import HttpError
+
+from components.telemetria import registrar_llamada
+
+# ----------------------------
+# ERRORES TRANSITORIOS DE DRIVE
+# ----------------------------
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+def es_reintentable(error):
+    if isinstance(error, HttpError):
+        estado = error.resp.status
+        if estado in ESTADOS_REINTENTABLES:
+            return True
+        # Drive también responde 403 cuando se supera la cuota
+        contenido = error.content or b""
+        return estado == 403 and (
+            b"rateLimitExceeded" in contenido or b"userRateLimitExceeded" in contenido
+        )
+
+    # IncompleteRead: la conexión se cortó a mitad de la respuesta
+    return isinstance(
+        error,
+        (ConnectionError, TimeoutError, socket.timeout, http.client.IncompleteRead)
+    )
+
+
+def con_reintentos(fn, intentos=6, espera_base=1.0, espera_max=32.0, descripcion="petición"):
+    """
+    Ejecuta `fn()` reintentando errores 429/5xx con backoff exponencial
+    (1s, 2s, 4s, ... hasta `espera_max`) y jitter.
+    """
+
+    for intento in range(1, intentos + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if intento == intentos or not es_reintentable(e):
+                raise
+
+            espera = min(espera_max, espera_base * 2 ** (intento - 1)) * random.uniform(0.5, 1.0)
+            print(f"⏳ {descripcion}: error transitorio ({e}); reintento {intento}/{intentos - 1} en {espera:.1f}s")
+            time.sleep(espera)
+
+
+# ----------------------------
+# EJECUCIÓN DE PETICIONES A DRIVE
+# ----------------------------
+def ejecutar_peticion(peticion, endpoint, bytes_movidos=None):
+    """
+    Vía común de las peticiones a Drive de los backends (drive_reader y
+    drive_local): `peticion()` (p. ej. request.execute) se reintenta
+    ante errores transitorios y, al terminar, se registra la llamada.
+
+    bytes_movidos: función opcional resultado → bytes transferidos.
+    """
+    resultado = con_reintentos(peticion, descripcion=endpoint)
+    registrar_llamada(endpoint, bytes_movidos(resultado) if bytes_movidos else 0)
+    return resultado
@@ -1,37 +1,87 @@
 import pandas as pd
 
+from components.esquema_banco import DIMENSIONES, clave_dimension
+
+# Dimensiones del cubo: cada hoja de resumen es un rollup de estas
+DIMENSIONES_CUBO = [
+    "ÁREA",
+    "PERIODICIDAD MEDICION",
+    "ESTADO DEL INDICADOR",
+    "JERARQUÍA",
+    "TIPO DE INDICADOR",
+]
+
+
+# =====================================================
+# CUBO Y ROLLUPS
+# =====================================================
+def construir_cubo(banco_activos):
+    """
+    Conteo de CONSE por combinación de dimensiones, en un solo groupby.
+    Las combinaciones con alguna dimensión vacía (NaN) se conservan:
+    cada rollup descarta solo las de sus propias dimensiones.
+    """
+    return banco_activos.groupby(
+        DIMENSIONES_CUBO, observed=True, dropna=False
+    )["CONSE"].count()
+
+
+def rollup(cubo, filas, columnas=None):
+    """
+    Equivalente a pd.pivot_table(index=filas, columns=columnas,
+    values="CONSE", aggfunc="count", fill_value=0) sumando el cubo.
+    """
+    niveles = [filas] if isinstance(filas, str) else list(filas)
+    if columnas:
+        niveles.append(columnas)
+
+    conteo = cubo.groupby(level=niveles, observed=True).sum()
+
+    if not columnas:
+        # Sin activos, pivot_table no deja ni la columna CONSE
+        return conteo.to_frame("CONSE") if len(conteo) else pd.DataFrame(index=conteo.index)
+
+    return conteo.unstack(columnas, fill_value=0)
+
+
+def codigos_por_grupo(banco_activos, filas, columnas):
+    """
+    Códigos únicos ordenados y unidos por ", " para cada celda filas ×
+    columnas (una sola agregación; "" donde no hay códigos).
+    """
+    codigos = (
+        banco_activos[[filas, columnas]]
+        .assign(CONSE=banco_activos["CONSE"].astype(str))
+        .dropna(subset=[filas, columnas])
+        .drop_duplicates()
+        .sort_values("CONSE")
+    )
+
+    unidos = codigos.groupby([filas, columnas], observed=True, sort=True)["CONSE"].agg(", ".join)
+    return unidos.unstack(columnas, fill_value="")
 
 
 def generar_resumenes(banco):
     # =====================================================
     # 🔥 FILTRAR SOLO INDICADORES ACTIVOS
     # =====================================================
-    banco_activos = banco[
-        banco["ESTADO DEL INDICADOR"]
-        .astype(str)
-        .str.strip()
-        .str.upper() == "ACTIVO"
-    ].copy()
-
-    # Normalizar periodicidad
-    banco_activos["PERIODICIDAD MEDICION"] = (
-        banco_activos["PERIODICIDAD MEDICION"]
-        .astype(str)
-        .str.strip()
-        .str.upper()
-    )
+    # Activos y periodicidad por su clave en mayúsculas; las demás
+    # dimensiones se agrupan por su valor tal cual (el banco que se
+    # escribe conserva su escritura original)
+    activos = clave_dimension(banco["ESTADO DEL INDICADOR"]) == "ACTIVO"
+    banco_activos = banco[activos.to_numpy()]
+    banco_activos = banco_activos.assign(**{
+        col: clave_dimension(banco_activos[col])
+        for col, por_clave in DIMENSIONES.items() if por_clave
+    })
+
+    cubo = construir_cubo(banco_activos)
 
     # =====================================================
     # 1️⃣ RESUMEN POR ÁREA
     # =====================================================
 
-    resumen_area = pd.pivot_table(
-        banco_activos,
-        index="ÁREA",
-        values="CONSE",
-        aggfunc="count",
-        fill_value=0
-    )
+    resumen_area = rollup(cubo, "ÁREA")
 
     resumen_area["TOTAL"] = resumen_area.sum(axis=1)
     resumen_area.loc["TOTAL GENERAL"] = resumen_area.sum()
@@ -41,13 +91,7 @@ def generar_resumenes(banco):
     # 2️⃣ RESUMEN POR ESTADO
     # =====================================================
 
-    resumen_estado = pd.pivot_table(
-        banco_activos,
-        index="ESTADO DEL INDICADOR",
-        values="CONSE",
-        aggfunc="count",
-        fill_value=0
-    )
+    resumen_estado = rollup(cubo, "ESTADO DEL INDICADOR")
 
     resumen_estado["TOTAL"] = resumen_estado.sum(axis=1)
     resumen_estado.loc["TOTAL GENERAL"] = resumen_estado.sum()
@@ -57,23 +101,9 @@ def generar_resumenes(banco):
     # 3️⃣ RESUMEN PERIODICIDAD + FICHAS
     # =====================================================
 
-    pivot_conteo = pd.pivot_table(
-        banco_activos,
-        index="ÁREA",
-        columns="PERIODICIDAD MEDICION",
-        values="CONSE",
-        aggfunc="count",
-        fill_value=0
-    )
+    pivot_conteo = rollup(cubo, "ÁREA", "PERIODICIDAD MEDICION")
 
-    pivot_codigos = pd.pivot_table(
-        banco_activos,
-        index="ÁREA",
-        columns="PERIODICIDAD MEDICION",
-        values="CONSE",
-        aggfunc=lambda x: ", ".join(sorted(x.astype(str).unique())),
-        fill_value=""
-    )
+    pivot_codigos = codigos_por_grupo(banco_activos, "ÁREA", "PERIODICIDAD MEDICION")
 
     pivot_codigos.columns = [f"{col} - FICHAS" for col in pivot_codigos.columns]
 
@@ -101,14 +131,7 @@ def generar_resumenes(banco):
     # 5️⃣ RESUMEN CUMPLE / NO CUMPLE + PERIODICIDAD
     # =====================================================
 
-    resumen_cumple = pd.pivot_table(
-        banco_activos,
-        index=["ÁREA", "PERIODICIDAD MEDICION"],
-        columns="ESTADO DEL INDICADOR",
-        values="CONSE",
-        aggfunc="count",
-        fill_value=0
-    )
+    resumen_cumple = rollup(cubo, ["ÁREA", "PERIODICIDAD MEDICION"], "ESTADO DEL INDICADOR")
 
     for col in ["CUMPLE", "NO CUMPLE"]:
         if col not in resumen_cumple.columns:
@@ -126,14 +149,7 @@ def generar_resumenes(banco):
     # 5️⃣ RESUMEN POR JERARQUÍA
     # =====================================================
 
-    resumen_jerarquia = pd.pivot_table(
-        banco_activos,
-        index="ÁREA",
-        columns="JERARQUÍA",
-        values="CONSE",
-        aggfunc="count",
-        fill_value=0
-    )
+    resumen_jerarquia = rollup(cubo, "ÁREA", "JERARQUÍA")
 
     resumen_jerarquia["TOTAL"] = resumen_jerarquia.sum(axis=1)
     resumen_jerarquia.loc["TOTAL GENERAL"] = resumen_jerarquia.sum()
@@ -144,14 +160,7 @@ def generar_resumenes(banco):
     # 6️⃣ RESUMEN TIPO DE INDICADOR
     # =====================================================
 
-    resumen_tipo = pd.pivot_table(
-        banco_activos,
-        index="TIPO DE INDICADOR",
-        columns="ÁREA",
-        values="CONSE",
-        aggfunc="count",
-        fill_value=0
-    )
+    resumen_tipo = rollup(cubo, "TIPO DE INDICADOR", "ÁREA")
 
     resumen_tipo["TOTAL"] = resumen_tipo.sum(axis=1)
     resumen_tipo.loc["TOTAL GENERAL"] = resumen_tipo.sum()
@@ -0,0 +1,50 @@
+import hashlib
+import io
+import re
+import zipfile
+
+# ----------------------------
+# SALIDAS BYTE A BYTE REPETIBLES
+# ----------------------------
+# openpyxl estampa la hora actual en docProps/core.xml (created y
+# modified) y zipfile la pone en cada entrada del zip: dos libros con
+# el mismo contenido nunca tienen el mismo md5. Aquí se fijan esas
+# marcas para que un libro sin cambios sea idéntico al ya publicado y
+# la subida se pueda omitir (ver publicar_drive).
+#
+# El orden de hojas y estilos ya es estable: openpyxl los escribe en el
+# orden en que se crean/registran. Se conserva el orden de las entradas.
+
+FECHA_DOCPROPS = b"2000-01-01T00:00:00Z"
+FECHA_ZIP = (1980, 1, 1, 0, 0, 0)
+
+_FECHAS_CORE = re.compile(rb"(<dcterms:(?:created|modified)[^>]*>)[^<]*(</dcterms:)")
+
+
+def xlsx_determinista(datos):
+    """
+    Reescribe el xlsx con fechas fijas en docProps/core.xml y en las
+    entradas del zip. El contenido de las hojas no cambia.
+    """
+    salida = io.BytesIO()
+
+    with zipfile.ZipFile(io.BytesIO(datos)) as origen, \
+            zipfile.ZipFile(salida, "w", zipfile.ZIP_DEFLATED) as destino:
+        for info in origen.infolist():
+            contenido = origen.read(info)
+            if info.filename == "docProps/core.xml":
+                contenido = _FECHAS_CORE.sub(rb"\g<1>" + FECHA_DOCPROPS + rb"\g<2>", contenido)
+
+            entrada = zipfile.ZipInfo(info.filename, date_time=FECHA_ZIP)
+            entrada.compress_type = zipfile.ZIP_DEFLATED
+            entrada.external_attr = 0o600 << 16
+            destino.writestr(entrada, contenido)
+
+    return salida.getvalue()
+
+
+def md5_bytes(datos):
+    """
+    md5 en hexadecimal, el mismo formato que md5Checksum de Drive.
+    """
+    return hashlib.md5(datos).hexdigest()
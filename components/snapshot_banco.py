@@ -0,0 +1,92 @@
+import importlib.util
+import json
+import os
+
+import pandas as pd
+
+# Subir si cambia lo que se guarda en el snapshot
+VERSION_SNAPSHOT = 1
+
+
+# ----------------------------
+# SNAPSHOT LOCAL DEL BANCO
+# ----------------------------
+class SnapshotBanco:
+    """
+    Copia local en Feather del banco tal como lo devuelve
+    pd.read_excel(dtype=str), marcada con el md5Checksum de Drive del
+    xlsx de origen. Si el xlsx no cambió, se carga el snapshot en vez
+    de descargar y parsear el libro.
+
+    Feather necesita pyarrow; sin él el snapshot queda desactivado y
+    siempre se parsea el xlsx.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.ruta_meta = f"{ruta}.json"
+        self.disponible = importlib.util.find_spec("pyarrow") is not None
+
+        if not self.disponible:
+            print(
+                "⚠ pyarrow no está instalado: snapshot local del banco desactivado, "
+                "el banco se descarga y parsea en cada ejecución (pip install pyarrow)"
+            )
+
+    def _meta(self):
+        if not os.path.exists(self.ruta_meta):
+            return {}
+        try:
+            with open(self.ruta_meta, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def cargar(self, md5):
+        """
+        DataFrame del snapshot si corresponde a `md5`; si no, None.
+        """
+        if not (self.disponible and md5):
+            return None
+
+        meta = self._meta()
+        if meta.get("version") != VERSION_SNAPSHOT or meta.get("md5") != md5:
+            return None
+
+        try:
+            banco = pd.read_feather(self.ruta)
+        except Exception as e:
+            print(f"⚠ Snapshot del banco ilegible, se parsea el xlsx: {e}")
+            return None
+
+        if len(banco) != meta.get("filas"):
+            return None
+        return banco
+
+    def guardar(self, md5, banco):
+        if not (self.disponible and md5):
+            return
+
+        carpeta = os.path.dirname(self.ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+
+        try:
+            # Sin marca mientras se reemplaza el archivo
+            if os.path.exists(self.ruta_meta):
+                os.remove(self.ruta_meta)
+
+            tmp = f"{self.ruta}.tmp"
+            banco.reset_index(drop=True).to_feather(tmp)
+            os.replace(tmp, self.ruta)
+
+            tmp = f"{self.ruta_meta}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(
+                    {"version": VERSION_SNAPSHOT, "md5": md5, "filas": len(banco)},
+                    fh
+                )
+            os.replace(tmp, self.ruta_meta)
+        except Exception as e:
+            # El snapshot es solo una aceleración: nunca corta la ejecución
+            print(f"⚠ No se pudo guardar el snapshot del banco: {e}")
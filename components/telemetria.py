@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# ----------------------------
+# TELEMETRÍA DE LA EJECUCIÓN
+# ----------------------------
+# Tiempo de pared y de CPU por etapa de main(), más llamadas a la API
+# de Drive (y bytes movidos) por endpoint. Los backends reportan cada
+# llamada con registrar_llamada; las etapas se abren con `etapa()`.
+# El pool de clientes de Drive reporta además las conexiones HTTP
+# abiertas y reutilizadas (registrar_conexion), y la etapa de fichas
+# el pico y las esperas del presupuesto de descargas
+# (registrar_presupuesto).
+
+ENDPOINTS = ("list", "get", "get_media", "export", "update", "create", "changes")
+
+_lock = threading.Lock()
+_api = {}
+_etapas = []
+_conexiones = {"abiertas": 0, "reutilizadas": 0}
+_presupuesto = {}
+
+
+def reiniciar():
+    with _lock:
+        _api.clear()
+        _etapas.clear()
+        _conexiones.update(abiertas=0, reutilizadas=0)
+        _presupuesto.clear()
+
+
+def registrar_llamada(endpoint, bytes_movidos=0):
+    with _lock:
+        contador = _api.setdefault(endpoint, {"llamadas": 0, "bytes": 0})
+        contador["llamadas"] += 1
+        contador["bytes"] += bytes_movidos
+
+
+def registrar_conexion(reutilizada):
+    with _lock:
+        _conexiones["reutilizadas" if reutilizada else "abiertas"] += 1
+
+
+def registrar_presupuesto(presupuesto):
+    """
+    Guarda el límite, el pico de bytes en vuelo y las veces que una
+    descarga no cupo de un PresupuestoBytes ya usado.
+    """
+    with _lock:
+        _presupuesto.update(
+            limite_bytes=presupuesto.limite,
+            pico_bytes=presupuesto.pico,
+            esperas=presupuesto.esperas
+        )
+
+
+def _copia_api():
+    with _lock:
+        return {k: dict(v) for k, v in _api.items()}
+
+
+def _cpu_hijos():
+    tiempos = os.times()
+    return tiempos.children_user + tiempos.children_system
+
+
+@contextmanager
+def etapa(nombre):
+    """
+    Mide una etapa. El CPU es el del proceso completo (incluye los
+    hilos de descarga/subida que trabajen durante la etapa) más el de
+    los procesos hijos terminados en ella (os.times): los workers del
+    ProcessPoolExecutor de las fichas cuentan porque el pool se cierra
+    antes de salir de la etapa.
+    """
+
+    api_antes = _copia_api()
+    inicio = time.perf_counter()
+    cpu_inicio = time.process_time() + _cpu_hijos()
+
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        cpu = time.process_time() + _cpu_hijos() - cpu_inicio
+        api_despues = _copia_api()
+
+        registro = {"etapa": nombre, "segundos": round(segundos, 3), "cpu_segundos": round(cpu, 3)}
+        bytes_etapa = 0
+        for endpoint in ENDPOINTS + tuple(e for e in api_despues if e not in ENDPOINTS):
+            antes = api_antes.get(endpoint, {"llamadas": 0, "bytes": 0})
+            despues = api_despues.get(endpoint, {"llamadas": 0, "bytes": 0})
+            registro[endpoint] = despues["llamadas"] - antes["llamadas"]
+            bytes_etapa += despues["bytes"] - antes["bytes"]
+        registro["bytes"] = bytes_etapa
+
+        with _lock:
+            _etapas.append(registro)
+
+
+# ----------------------------
+# RESUMEN
+# ----------------------------
+def tabla_tiempos():
+    """
+    DataFrame con una fila por etapa y una fila TOTAL.
+    """
+    import pandas as pd
+
+    with _lock:
+        df = pd.DataFrame(list(_etapas))
+
+    if df.empty:
+        return df
+
+    total = df.drop(columns=["etapa"]).sum(numeric_only=True)
+    total["etapa"] = "TOTAL"
+    return pd.concat([df, total.to_frame().T], ignore_index=True)[df.columns]
+
+
+
+
+def resumen():
+    with _lock:
+        etapas = [dict(e) for e in _etapas]
+        conexiones = dict(_conexiones)
+        presupuesto = dict(_presupuesto)
+
+    return {
+        "etapas": etapas,
+        "total_segundos": round(sum(e["segundos"] for e in etapas), 3),
+        "total_cpu_segundos": round(sum(e["cpu_segundos"] for e in etapas), 3),
+        "api": _copia_api(),
+        "conexiones": conexiones,
+        "presupuesto_descargas": presupuesto,
+    }
+
+
+def guardar_resumen(ruta, extra=None):
+    datos = resumen()
+    if extra:
+        datos.update(extra)
+
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+
+    tmp = f"{ruta}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(datos, fh, indent=2, ensure_ascii=False)
+    os.replace(tmp, ruta)
+
+    return datos
+
+
+def imprimir_resumen():
+    datos = resumen()
+    print("\n⏱ Tiempos por etapa:")
+    for e in datos["etapas"]:
+        llamadas = sum(e.get(k, 0) for k in ENDPOINTS)
+        print(
+            f"   {e['etapa']:<14} {e['segundos']:>8.2f}s  CPU {e['cpu_segundos']:>7.2f}s  "
+            f"API {llamadas:>5}  {e['bytes'] / 1024:>9.1f} KB"
+        )
+    print(f"   {'TOTAL':<14} {datos['total_segundos']:>8.2f}s")
+
+    conexiones = datos["conexiones"]
+    if conexiones["abiertas"] or conexiones["reutilizadas"]:
+        print(
+            f"🔗 Conexiones HTTP: {conexiones['abiertas']} abiertas, "
+            f"{conexiones['reutilizadas']} reutilizadas"
+        )
+
+    presupuesto = datos["presupuesto_descargas"]
+    if presupuesto:
+        print(
+            f"📦 Descargas en vuelo: pico {presupuesto['pico_bytes'] / 1024:.1f} KB "
+            f"de {presupuesto['limite_bytes'] / 1024 / 1024:.0f} MB, "
+            f"{presupuesto['esperas']} esperas"
+        )
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+# ----------------------------
+# MESES DEL BANCO (NUMÉRICOS)
+# ----------------------------
+# Los doce meses viajan en el banco como float64 (NaN = sin dato). El
+# texto del Excel se arma solo al escribirlo y es el mismo que antes,
+# celda por celda:
+#
+#   - Filas de fichas: COL_UNIDAD trae un carácter por mes ("%" o "#").
+#     Un mes es porcentaje desde el primero que lo fue en la ficha (la
+#     decisión celda a celda de siempre: los anteriores siguen como
+#     número). Sin dato → "N/A".
+#   - Filas que solo vienen del banco de Drive (COL_UNIDAD vacía): se
+#     escribe el texto tal como se leyó, guardado en COL_TEXTO.
+
+MESES = [
+    "ene-25", "feb-25", "mar-25", "abr-25", "may-25", "jun-25",
+    "jul-25", "ago-25", "sept-25", "oct-25", "nov-25", "dic-25",
+]
+
+COL_UNIDAD = "_UNIDAD"
+UNIDAD_PORCENTAJE = "%"
+UNIDAD_NUMERO = "#"
+
+# Tupla con el texto original de los doce meses (filas del banco)
+COL_TEXTO = "_TEXTO_MESES"
+
+
+def columnas_meses(df):
+    """
+    Columnas de meses presentes en `df`, sin importar mayúsculas (el
+    render las pasa a mayúsculas antes de los resúmenes).
+    """
+    meses = set(MESES)
+    return [c for c in df.columns if str(c).lower() in meses]
+
+
+def _columna_interna(df, nombre):
+    return next((c for c in df.columns if str(c).upper() == nombre), None)
+
+
+def a_numero(serie):
+    """
+    Serie de texto ("85.00%", "45,5", "N/A", "") → float64 (NaN si no
+    es un número). Si ya es numérica se devuelve tal cual.
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype("float64")
+
+    texto = (
+        serie.astype("string")
+        .str.replace("%", "", regex=False)
+        .str.replace(",", ".", regex=False)
+        .str.strip()
+    )
+    return pd.to_numeric(texto, errors="coerce").astype("float64")
+
+
+# ----------------------------
+# TEXTO → MATRIZ (banco leído de Drive)
+# ----------------------------
+def normalizar_meses(banco):
+    """
+    Convierte en el sitio los meses de texto (banco leído con dtype=str)
+    a float64; el texto original de cada fila queda en COL_TEXTO.
+
+    Es idempotente: las columnas ya numéricas no se tocan.
+    """
+    meses = columnas_meses(banco)
+    texto = [c for c in meses if not pd.api.types.is_numeric_dtype(banco[c])]
+
+    col_unidad = _columna_interna(banco, COL_UNIDAD) or COL_UNIDAD
+    if col_unidad not in banco.columns:
+        banco[col_unidad] = ""
+
+    col_texto = _columna_interna(banco, COL_TEXTO) or COL_TEXTO
+    if col_texto not in banco.columns:
+        banco[col_texto] = None
+
+    if texto:
+        por_mes = {str(c).lower(): banco[c].tolist() for c in texto}
+        columnas = [por_mes.get(mes) for mes in MESES]
+        banco[col_texto] = [
+            tuple(valores[i] if valores else None for valores in columnas)
+            for i in range(len(banco))
+        ]
+
+    for col in texto:
+        banco[col] = a_numero(banco[col])
+
+    return banco
+
+
+# ----------------------------
+# MATRIZ → TEXTO (solo al renderizar)
+# ----------------------------
+def formatear_meses(banco):
+    """
+    Copia del banco lista para Excel, sin las columnas internas. En
+    filas de fichas: porcentajes como "85.00%", números redondeados a 2
+    decimales y "N/A" sin dato. En las demás, el texto leído (sin
+    fórmulas).
+    """
+    meses = columnas_meses(banco)
+    col_unidad = _columna_interna(banco, COL_UNIDAD)
+    col_texto = _columna_interna(banco, COL_TEXTO)
+
+    if col_unidad is None:
+        return banco.copy()
+
+    salida = banco.drop(columns=[c for c in (col_unidad, col_texto) if c])
+    unidades = banco[col_unidad].fillna("").astype(str).tolist()
+    de_ficha = np.array([u != "" for u in unidades], dtype=bool)
+    textos = banco[col_texto].tolist() if col_texto else [None] * len(banco)
+
+    for col in meses:
+        j = MESES.index(str(col).lower())
+        valores = a_numero(banco[col]).to_numpy()
+        vacio = np.isnan(valores)
+        pct = np.array([len(u) > j and u[j] == UNIDAD_PORCENTAJE for u in unidades], dtype=bool)
+
+        formateado = np.empty(len(valores), dtype=object)
+        formateado[:] = [
+            t[j] if t and isinstance(t[j], str) and not t[j].startswith("=") else None
+            for t in textos
+        ]
+
+        numero = de_ficha & ~vacio & ~pct
+        formateado[numero] = [round(v, 2) for v in valores[numero].tolist()]
+        porcentaje = de_ficha & ~vacio & pct
+        formateado[porcentaje] = [f"{v:.2f}%" for v in valores[porcentaje].tolist()]
+        formateado[de_ficha & vacio] = "N/A"
+
+        salida[col] = formateado
+
+    return salida
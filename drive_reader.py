@@ -1,8 +1,16 @@
+import functools
 import io
+import os
+import tempfile
+import threading
 from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaIoBaseDownload, MediaIoBaseUpload
 
+from components.pool_drive import PoolClientes
+from components.reintentos import con_reintentos, ejecutar_peticion
+from components.telemetria import registrar_llamada
+
 # ------------------------------------------
 # CONFIGURACIÓN GOOGLE DRIVE
 # ------------------------------------------
@@ -11,18 +19,173 @@ SCOPES = ["https://www.googleapis.com/auth/drive"]
 # Ruta al archivo de credenciales
 CREDENTIALS_FILE = "python-drive-service-a7c2f08eb564.json"
 
-# Crear credenciales desde archivo JSON
-creds = Credentials.from_service_account_file(
-    CREDENTIALS_FILE,
-    scopes=SCOPES
-)
+# Credenciales y pool se crean en el primer uso (no al importar):
+# la interfaz abre sin esperar a Drive ni exigir credenciales.
+_creds = None
+_pool = None
+_servicio_lock = threading.Lock()
+
+# Cliente que cada hilo tiene tomado del pool (ver con_cliente)
+_cliente_hilo = threading.local()
+
+
+def get_credentials():
+    global _creds
+
+    with _servicio_lock:
+        if _creds is None:
+            _creds = Credentials.from_service_account_file(
+                CREDENTIALS_FILE,
+                scopes=SCOPES
+            )
+        return _creds
+
+
+def get_pool():
+    global _pool
+
+    creds = get_credentials()
+    with _servicio_lock:
+        if _pool is None:
+            _pool = PoolClientes(creds)
+        return _pool
+
+
+def precalentar():
+    """
+    Carga las credenciales y deja un cliente listo en el pool.
+    """
+    get_pool().precalentar()
+
+
+def con_cliente(fn):
+    """
+    Mientras la función se ejecuta, el hilo usa un cliente del pool
+    (tomado en el primer get_drive_service) y lo devuelve al terminar.
+    Las llamadas anidadas comparten el mismo.
+    """
+
+    @functools.wraps(fn)
+    def envuelta(*args, **kwargs):
+        if getattr(_cliente_hilo, "activo", False):
+            return fn(*args, **kwargs)
+
+        _cliente_hilo.activo = True
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _cliente_hilo.activo = False
+            service, _cliente_hilo.service = getattr(_cliente_hilo, "service", None), None
+            if service is not None:
+                get_pool().devolver(service)
+
+    return envuelta
+
+
+def get_drive_service():
+    service = getattr(_cliente_hilo, "service", None)
+    if service is None:
+        service = get_pool().tomar()
+        _cliente_hilo.service = service
+    return service
+
+
+# ------------------------------------------
+# METADATOS DE ARCHIVOS (CACHE POR EJECUCIÓN)
+# ------------------------------------------
+SHORTCUT_MIME = "application/vnd.google-apps.shortcut"
+CAMPOS_METADATOS = "id, name, mimeType, md5Checksum, modifiedTime, size, appProperties, shortcutDetails(targetId, targetMimeType)"
+
+# file_id → metadatos ya vistos en algún listado de esta ejecución
+_metadatos = {}
+_metadatos_lock = threading.Lock()
+
+
+# Listados por carpeta de esta ejecución:
+# folder_id → [archivos] y folder_id → {nombre: metadatos}
+_listados_carpeta = {}
+_indices_carpeta = {}
+
+
+def reset_metadata_cache():
+    with _metadatos_lock:
+        _metadatos.clear()
+        _listados_carpeta.clear()
+        _indices_carpeta.clear()
+
+
+def remember_metadata(archivos):
+    with _metadatos_lock:
+        for archivo in archivos:
+            if archivo.get("id") and archivo.get("mimeType"):
+                _metadatos[archivo["id"]] = archivo
+    return archivos
+
+
+@con_cliente
+def get_file_metadata(file_id):
+    with _metadatos_lock:
+        metadata = _metadatos.get(file_id)
+
+    if metadata is None:
+        metadata = ejecutar_peticion(
+            get_drive_service().files().get(
+                fileId=file_id,
+                fields=CAMPOS_METADATOS,
+                supportsAllDrives=True
+            ).execute,
+            "get"
+        )
+        remember_metadata([metadata])
+
+    return metadata
+
+
+@con_cliente
+def prefetch_metadata(file_ids):
+    """
+    Trae en lotes (batch HTTP, 100 por petición) los metadatos que aún
+    no están en la cache.
+    """
+    with _metadatos_lock:
+        pendientes = [i for i in dict.fromkeys(file_ids) if i and i not in _metadatos]
+
+    def guardar(request_id, response, exception):
+        if exception is None:
+            remember_metadata([response])
+
+    service = get_drive_service()
+    for i in range(0, len(pendientes), 100):
+        batch = service.new_batch_http_request(callback=guardar)
+        for file_id in pendientes[i:i + 100]:
+            batch.add(
+                service.files().get(
+                    fileId=file_id,
+                    fields=CAMPOS_METADATOS,
+                    supportsAllDrives=True
+                ),
+                request_id=file_id
+            )
+            registrar_llamada("get")
+        con_reintentos(batch.execute, descripcion="lote de metadatos")
+
+
+def shortcut_targets(archivos):
+    """
+    Destinos de accesos directos cuyo tipo no vino en el listado.
+    """
+    return [
+        a["shortcutDetails"]["targetId"]
+        for a in archivos
+        if a.get("mimeType") == SHORTCUT_MIME
+        and not (a.get("shortcutDetails") or {}).get("targetMimeType")
+    ]
 
-# Servicio de Google Drive
-drive_service = build("drive", "v3", credentials=creds)
 
 # ------------------------------------------------
 # OBTENER ID DEL BANCO DESDE UNA CARPETA
 # ------------------------------------------------
+@con_cliente
 def get_banco_file_id_from_folder(folder_id):
     query = (
         f"'{folder_id}' in parents and "
@@ -31,13 +194,16 @@ def get_banco_file_id_from_folder(folder_id):
         f"trashed = false"
     )
 
-    response = drive_service.files().list(
-        q=query,
-        fields="files(id, name, mimeType)",
-        pageSize=1
-    ).execute()
+    response = ejecutar_peticion(
+        get_drive_service().files().list(
+            q=query,
+            fields=f"files({CAMPOS_METADATOS})",
+            pageSize=1
+        ).execute,
+        "list"
+    )
 
-    files = response.get("files", [])
+    files = remember_metadata(response.get("files", []))
 
     if not files:
         raise ValueError("❌ No se encontró ningún archivo banco en la carpeta")
@@ -48,20 +214,29 @@ def get_banco_file_id_from_folder(folder_id):
 # ------------------------------------------
 # LISTAR ARCHIVOS EN UNA CARPETA DE DRIVE
 # ------------------------------------------
+@con_cliente
 def list_files_in_folder(folder_id):
     archivos = []
     page_token = None
 
     while True:
-        response = drive_service.files().list(
-            q=f"'{folder_id}' in parents and trashed = false",
-            fields="nextPageToken, files(id, name, mimeType)",
-            pageToken=page_token,
-            supportsAllDrives=True,          # 🔥 CLAVE
-            includeItemsFromAllDrives=True   # 🔥 CLAVE
-        ).execute()
-
-        archivos.extend(response.get("files", []))
+        response = ejecutar_peticion(
+            get_drive_service().files().list(
+                q=f"'{folder_id}' in parents and trashed = false",
+                fields=(
+                    "nextPageToken, files(id, name, mimeType, md5Checksum, "
+                    "modifiedTime, size, appProperties, shortcutDetails(targetId, targetMimeType))"
+                ),
+                orderBy="folder,name",
+                pageSize=1000,
+                pageToken=page_token,
+                supportsAllDrives=True,          # 🔥 CLAVE
+                includeItemsFromAllDrives=True   # 🔥 CLAVE
+            ).execute,
+            "list"
+        )
+
+        archivos.extend(remember_metadata(response.get("files", [])))
         page_token = response.get("nextPageToken")
 
         if not page_token:
@@ -70,50 +245,165 @@ def list_files_in_folder(folder_id):
     return archivos
 
 
+# ------------------------------------------
+# LISTAR VARIAS CARPETAS EN UNA BÚSQUEDA
+# ------------------------------------------
+# Carpetas por búsqueda ('a' in parents or 'b' in parents ...): la
+# consulta queda muy por debajo del largo máximo de `q`
+LOTE_CARPETAS = 50
+
+
+@con_cliente
+def list_files_in_folders(folder_ids):
+    """
+    Igual que list_files_in_folder (todos los hijos, sin filtrar por
+    tipo) para varias carpetas, con una búsqueda por cada LOTE_CARPETAS
+    carpetas. Cada ítem trae `parents` para agruparlo por carpeta.
+    """
+    folder_ids = list(folder_ids)
+    items = []
+
+    for inicio in range(0, len(folder_ids), LOTE_CARPETAS):
+        padres = " or ".join(f"'{f}' in parents" for f in folder_ids[inicio:inicio + LOTE_CARPETAS])
+        page_token = None
+
+        while True:
+            response = ejecutar_peticion(
+                get_drive_service().files().list(
+                    q=f"trashed = false and ({padres})",
+                    fields=(
+                        "nextPageToken, files(id, name, mimeType, parents, md5Checksum, "
+                        "modifiedTime, size, appProperties, shortcutDetails(targetId, targetMimeType))"
+                    ),
+                    orderBy="folder,name",
+                    pageSize=1000,
+                    pageToken=page_token,
+                    supportsAllDrives=True,
+                    includeItemsFromAllDrives=True
+                ).execute,
+                "list"
+            )
+
+            items.extend(remember_metadata(response.get("files", [])))
+            page_token = response.get("nextPageToken")
+
+            if not page_token:
+                break
+
+    return items
+
+
+# ------------------------------------------
+# CAMBIOS EN DRIVE (MODO INCREMENTAL)
+# ------------------------------------------
+@con_cliente
+def get_start_page_token():
+    response = ejecutar_peticion(
+        get_drive_service().changes().getStartPageToken(
+            supportsAllDrives=True
+        ).execute,
+        "changes"
+    )
+    return response["startPageToken"]
+
+
+@con_cliente
+def list_changes(page_token):
+    """
+    Retorna (cambios desde `page_token`, token para la próxima consulta).
+    """
+    cambios = []
+
+    while True:
+        response = ejecutar_peticion(
+            get_drive_service().changes().list(
+                pageToken=page_token,
+                pageSize=1000,
+                fields=(
+                    "nextPageToken, newStartPageToken, changes(fileId, removed, "
+                    "file(id, name, mimeType, trashed, lastModifyingUser(me)))"
+                ),
+                supportsAllDrives=True,
+                includeItemsFromAllDrives=True
+            ).execute,
+            "changes"
+        )
+
+        cambios.extend(response.get("changes", []))
+
+        if "newStartPageToken" in response:
+            return cambios, response["newStartPageToken"]
+
+        page_token = response["nextPageToken"]
+
+
 # ------------------------------------------
 # LEER ARCHIVO EXCEL DESDE DRIVE
 # ------------------------------------------
-def read_excel_from_drive(file_id):
+MB = 1024 * 1024
 
-    file = drive_service.files().get(
-        fileId=file_id,
-        fields="id, name, mimeType, shortcutDetails",
-        supportsAllDrives=True
-    ).execute()
+# Cada descarga queda en memoria hasta este tamaño; por encima pasa a
+# un archivo temporal (SpooledTemporaryFile)
+UMBRAL_DESCARGA_MEMORIA = int(os.getenv("DESCARGA_UMBRAL_MEMORIA_MB", "16")) * MB
 
-    mime_type = file["mimeType"]
+# Bloque por petición (Range): si una falla se retoma desde el último
+# bloque recibido, no desde el inicio del archivo
+CHUNK_DESCARGA = 4 * MB
 
-    # Resolver shortcut
-    if mime_type == "application/vnd.google-apps.shortcut":
-        file_id = file["shortcutDetails"]["targetId"]
-        file = drive_service.files().get(
-            fileId=file_id,
-            fields="id, name, mimeType",
-            supportsAllDrives=True
-        ).execute()
-        mime_type = file["mimeType"]
 
-    fh = io.BytesIO()
+@con_cliente
+def read_excel_from_drive(file_id, metadata=None):
+    """
+    Descarga un Excel (o exporta una Google Sheet) a un stream (en
+    memoria hasta UMBRAL_DESCARGA_MEMORIA, luego en disco).
+
+    Con `metadata` del listado (mimeType y shortcutDetails) se va
+    directo a get_media/export sin consultar antes files().get.
+
+    Cuántas descargas quedan en memoria a la vez lo acota quien las
+    consume (descargar_fichas).
+    """
+
+    if not metadata or not metadata.get("mimeType"):
+        metadata = get_file_metadata(file_id)
+
+    mime_type = metadata["mimeType"]
+
+    # Resolver shortcut
+    if mime_type == SHORTCUT_MIME:
+        detalles = metadata["shortcutDetails"]
+        file_id = detalles["targetId"]
+        mime_type = detalles.get("targetMimeType") or get_file_metadata(file_id)["mimeType"]
 
     if mime_type == "application/vnd.google-apps.spreadsheet":
-        request = drive_service.files().export(
+        endpoint = "export"
+        request = get_drive_service().files().export(
             fileId=file_id,
             mimeType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             supportsAllDrives=True
         )
     elif mime_type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet":
-        request = drive_service.files().get_media(
+        endpoint = "get_media"
+        request = get_drive_service().files().get_media(
             fileId=file_id,
             supportsAllDrives=True
         )
     else:
         raise ValueError(f"❌ Tipo de archivo no soportado: {mime_type}")
 
-    downloader = MediaIoBaseDownload(fh, request)
+    fh = tempfile.SpooledTemporaryFile(max_size=UMBRAL_DESCARGA_MEMORIA)
+
+    downloader = MediaIoBaseDownload(fh, request, chunksize=CHUNK_DESCARGA)
     done = False
     while not done:
-        _, done = downloader.next_chunk()
+        # Un bloque fallido se vuelve a pedir desde el byte
+        # `_progress` (lo ya escrito en fh se conserva)
+        _, done = con_reintentos(
+            downloader.next_chunk,
+            descripcion=f"descarga {file_id}"
+        )
 
+    registrar_llamada(endpoint, fh.tell())
     fh.seek(0)
     return fh
 
@@ -123,6 +413,7 @@ def read_excel_from_drive(file_id):
 # ------------------------------------------
 # SUBIR / SOBRESCRIBIR ARCHIVO EN DRIVE
 # ------------------------------------------
+@con_cliente
 def upload_bytes_to_drive(bytes_data, file_id):
     fh = io.BytesIO(bytes_data)
 
@@ -132,54 +423,90 @@ def upload_bytes_to_drive(bytes_data, file_id):
         resumable=False
     )
 
-    updated_file = drive_service.files().update(
-        fileId=file_id,
-        media_body=media
-    ).execute()
+    updated_file = ejecutar_peticion(
+        get_drive_service().files().update(
+            fileId=file_id,
+            media_body=media
+        ).execute,
+        "update",
+        lambda _: len(bytes_data)
+    )
 
     return updated_file
 
 
 # ------------------------------------------
-# VERIFICAR SI UN ARCHIVO EXISTE EN DRIVE
+# SUBIDA REANUDABLE POR BLOQUES
 # ------------------------------------------
-def file_exists(file_id):
-    try:
-        drive_service.files().get(
-            fileId=file_id,
-            supportsAllDrives=True
-        ).execute()
-        return True
-    except:
-        return False
+# Múltiplo de 256 KB (requisito de la API)
+CHUNK_SUBIDA = 5 * 1024 * 1024
+
 
+def media_reanudable(bytes_data, mimetype):
+    return MediaIoBaseUpload(
+        io.BytesIO(bytes_data),
+        mimetype=mimetype,
+        chunksize=CHUNK_SUBIDA,
+        resumable=True
+    )
+
+
+def ejecutar_subida(request, filename):
+    """
+    Envía la subida bloque a bloque. Si un bloque falla con 429/5xx se
+    reintenta con backoff y la librería retoma desde el último byte
+    confirmado por Drive (no desde el inicio).
+    """
+    response = None
+    while response is None:
+        _, response = con_reintentos(
+            request.next_chunk,
+            descripcion=f"subida {filename}"
+        )
+    return response
 
 
 # ------------------------------------------
 # CREAR O ACTUALIZAR ARCHIVO EN DRIVE
 # ------------------------------------------
+@con_cliente
 def create_or_update_file(
     bytes_data,
     file_id=None,
     filename="archivo.xlsx",
     parent_folder_id=None,
-    mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    propiedades=None
 ):
-
-    media = MediaIoBaseUpload(
-        io.BytesIO(bytes_data),
-        mimetype=mimetype,
-        resumable=False
-    )
-
-    # 🔎 VALIDAR SI EL ID EXISTE
-    if file_id and file_exists(file_id):
-        print(f"♻ Actualizando archivo: {filename}")
-        return drive_service.files().update(
-            fileId=file_id,
-            media_body=media,
-            supportsAllDrives=True
-        ).execute()
+    """
+    propiedades: dict opcional que queda en appProperties del archivo
+    (lo lee publicar_drive.sin_cambios).
+    """
+
+    # 🔎 Se intenta actualizar directo; solo un 404 lleva a crear
+    if file_id:
+        try:
+            print(f"♻ Actualizando archivo: {filename}")
+            actualizado = ejecutar_subida(
+                get_drive_service().files().update(
+                    fileId=file_id,
+                    body={"appProperties": propiedades} if propiedades else None,
+                    media_body=media_reanudable(bytes_data, mimetype),
+                    supportsAllDrives=True
+                ),
+                filename
+            )
+            registrar_llamada("update", len(bytes_data))
+
+            # Los metadatos guardados (md5Checksum, appProperties) ya no
+            # corresponden al archivo
+            with _metadatos_lock:
+                _metadatos.pop(file_id, None)
+            return actualizado
+        except HttpError as e:
+            if e.resp.status != 404:
+                raise
+            registrar_llamada("update")
 
     # 🔄 Si el ID no existe, crear nuevo archivo
     print(f"🆕 Creando archivo (ID inválido o no existe): {filename}")
@@ -187,29 +514,67 @@ def create_or_update_file(
     metadata = {"name": filename}
     if parent_folder_id:
         metadata["parents"] = [parent_folder_id]
+    if propiedades:
+        metadata["appProperties"] = propiedades
+
+    creado = ejecutar_subida(
+        get_drive_service().files().create(
+            body=metadata,
+            media_body=media_reanudable(bytes_data, mimetype),
+            fields="id",
+            supportsAllDrives=True
+        ),
+        filename
+    )
+    registrar_llamada("create", len(bytes_data))
 
-    return drive_service.files().create(
-        body=metadata,
-        media_body=media,
-        fields="id",
-        supportsAllDrives=True
-    ).execute()
+    # Mantener el índice de la carpeta al día para el resto de la ejecución
+    with _metadatos_lock:
+        if parent_folder_id in _indices_carpeta:
+            _indices_carpeta[parent_folder_id].setdefault(filename, {"id": creado["id"], "name": filename})
 
+    return creado
 
 
-def get_file_id_by_name(folder_id, filename):
-    query = (
-        f"'{folder_id}' in parents and "
-        f"name = '{filename}' and trashed = false"
-    )
 
-    response = drive_service.files().list(
-        q=query,
-        fields="files(id, name)",
-        supportsAllDrives=True,
-        includeItemsFromAllDrives=True
-    ).execute()
+# ------------------------------------------
+# BUSCAR ARCHIVO POR NOMBRE (ÍNDICE POR CARPETA)
+# ------------------------------------------
+def list_folder_cached(folder_id):
+    """
+    Igual que list_files_in_folder, pero cada carpeta se lista una sola
+    vez por ejecución.
+    """
+    with _metadatos_lock:
+        archivos = _listados_carpeta.get(folder_id)
+
+    if archivos is None:
+        archivos = list_files_in_folder(folder_id)
+        with _metadatos_lock:
+            archivos = _listados_carpeta.setdefault(folder_id, archivos)
+
+    return archivos
+
+
+def folder_index(folder_id):
+    """
+    nombre → metadatos de los archivos de la carpeta; las búsquedas por
+    nombre no vuelven a consultar Drive.
+    """
+    with _metadatos_lock:
+        indice = _indices_carpeta.get(folder_id)
+
+    if indice is None:
+        indice = {}
+        for archivo in list_folder_cached(folder_id):
+            indice.setdefault(archivo["name"], archivo)
 
-    files = response.get("files", [])
-    return files[0]["id"] if files else None
+        with _metadatos_lock:
+            indice = _indices_carpeta.setdefault(folder_id, indice)
 
+    return indice
+
+
+def get_file_id_by_name(folder_id, filename):
+    archivo = folder_index(folder_id).get(filename)
+    return archivo["id"] if archivo else None
@@ -1,37 +1,34 @@
+import time
+
+# Arranque de la app (para medir cuánto tarda en verse la ventana)
+INICIO_APP = time.perf_counter()
 
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
 import sys
 import itertools
-import time
-    # 👇 IMPORTS PESADOS AQUÍ (NO ARRIBA)
-import io
-import pandas as pd
+import importlib
+import multiprocessing
+import os
 from datetime import datetime
 
-from drive_reader import (
-    list_files_in_folder,
-    read_excel_from_drive,
-    get_file_id_by_name,
-    create_or_update_file
+from components import telemetria
+
+# 👇 Los IMPORTS PESADOS (pandas, openpyxl, Google API) se hacen dentro
+# de main() o en la precarga en segundo plano, nunca arriba: la ventana
+# se pinta sin esperarlos.
+MODULOS_PESADOS = (
+    "pandas",
+    "openpyxl",
+    "components.banco_drive",
+    "components.procesar_fichas",
+    "components.cache_fichas",
+    "components.guardar_banco_drive",
+    "components.guardar_reportes_drive",
+    "components.publicar_drive",
 )
 
-from components.banco_drive import (
-    cargar_banco_drive,
-    clean_str,
-    norm_code,
-    FICHAS_FOLDER_ID,
-    BANCO_FOLDER_ID,
-    REPORTE_FOLDER_ID,
-    cargar_datos_manuales,
-    unir_datos_manuales
-)
-
-from components.procesar_fichas import procesar_fichas_drive
-from components.guardar_banco_drive import guardar_banco_con_estilos_drive
-from components.guardar_reportes_drive import guardar_reportes_drive
-
 
 # ======================================================
 # REDIRIGIR PRINTS A LA INTERFAZ
@@ -59,10 +56,49 @@ class RedirectText:
 # ======================================================
 # MAIN REAL (TU LÓGICA COMPLETA) CON LOG DE CARPETAS Y ARCHIVOS
 # ======================================================
-def main():
+def main(modo="completo"):
+    """
+    modo "completo": procesa todas las fichas del año.
+    modo "incremental": si nada cambió en Drive desde la última
+    ejecución exitosa (Changes API) termina sin hacer nada; si no,
+    procesa todas las fichas del año y solo las modificadas se
+    descargan (las demás salen de la cache local).
+    """
     try:
+        telemetria.reiniciar()
         print("🚀 Iniciando proceso automático\n", flush=True)
 
+        # 👇 IMPORTS PESADOS AQUÍ (NO ARRIBA)
+        from components.backend_drive import cargar_backend
+        from components.banco_drive import (
+            cargar_banco_drive,
+            clean_str,
+            norm_code,
+            FICHAS_FOLDER_ID,
+            BANCO_FOLDER_ID,
+            REPORTE_FOLDER_ID,
+            MANUAL_FILE_ID,
+            cargar_datos_manuales,
+            unir_datos_manuales
+        )
+        from components.normalizacion import normalizar
+        from components.procesar_fichas import procesar_fichas_drive, VERSION_EXTRACCION
+        from components.cache_fichas import CacheFichas
+        from components.snapshot_banco import SnapshotBanco
+        from components.presupuesto_bytes import PresupuestoBytes
+        from components.descubrir_fichas import buscar_fichas_arbol, buscar_fichas_por_carpetas
+        from components.incremental import (
+            leer_estado,
+            guardar_estado,
+            ids_cambiados,
+            filtrar_fichas_cambiadas,
+            filas_reconstruccion,
+            verificar_filas_banco
+        )
+        from components.guardar_banco_drive import renderizar_banco_con_estilos
+        from components.guardar_reportes_drive import generar_reportes
+        from components.publicar_drive import publicar_archivos
+
         # ======================================================
         # FECHA AUTOMÁTICA
         # ======================================================
@@ -80,14 +116,48 @@ def main():
         COL_CODIGO = "CONSE"
         BANCO_BASE_FILENAME = "Banco_Indicadores_BASE.xlsx"
 
+        # Descargas simultáneas de fichas (configurable por entorno)
+        MAX_WORKERS_DESCARGA = int(os.getenv("MAX_WORKERS_DESCARGA", "8"))
+        MAX_WORKERS_SUBIDA = int(os.getenv("MAX_WORKERS_SUBIDA", "4"))
+
+        # MB de fichas descargadas (o descargándose) y aún sin procesar
+        DESCARGAS_EN_VUELO_MB = int(os.getenv("DESCARGAS_EN_VUELO_MB", "128"))
+
+        # Procesos para parsear fichas (por defecto, uno por núcleo)
+        PROCESOS_PARSEO = int(os.getenv("PROCESOS_PARSEO", str(os.cpu_count() or 1)))
+
+        # Publicar aunque una ejecución incremental deje menos filas que
+        # una completa (ver verificar_filas_banco)
+        PERMITIR_BANCO_MENOR = os.getenv("PERMITIR_BANCO_MENOR") == "1"
+
+        # "arbol": una búsqueda por nivel; "carpetas": un listado por carpeta
+        MODO_DESCUBRIMIENTO = os.getenv("MODO_DESCUBRIMIENTO", "arbol")
+
+        # Cache local de fichas ya extraídas
+        CACHE_FICHAS_PATH = os.getenv("CACHE_FICHAS_PATH", os.path.join(".cache", "fichas.json"))
+        SNAPSHOT_BANCO_PATH = os.getenv("SNAPSHOT_BANCO_PATH", os.path.join(".cache", "banco.feather"))
+
+        # Token de la Changes API de la última ejecución exitosa
+        ESTADO_INCREMENTAL_PATH = os.getenv(
+            "ESTADO_INCREMENTAL_PATH", os.path.join(".cache", "estado_incremental.json")
+        )
+
+        # Resumen de tiempos y llamadas a la API de esta ejecución
+        RESUMEN_EJECUCION_PATH = os.getenv(
+            "RESUMEN_EJECUCION_PATH", os.path.join(".cache", "resumen_ejecucion.json")
+        )
+
         print("🚀 Iniciando proceso automático\n")
 
+        # Drive real o carpeta local (DRIVE_BACKEND)
+        drive = cargar_backend()
+
         # ==================================================
         # OBTENER CARPETAS
         # ==================================================
-        def get_or_last_folder(parent_id, preferred_name, label="carpeta"):
+        def get_or_last_folder(parent_id, preferred_name, label="carpeta", listar=drive.list_folder_cached):
             folders = [
-                f for f in list_files_in_folder(parent_id)
+                f for f in listar(parent_id)
                 if f.get("mimeType") == "application/vnd.google-apps.folder"
             ]
             if not folders:
@@ -101,109 +171,165 @@ def main():
             print(f"➡ Se selecciona última carpeta ordenada: {folders[-1]['name']}")
             return folders[-1]["id"]
 
-        FICHAS_ANIO_FOLDER_ID = get_or_last_folder(FICHAS_FOLDER_ID, ANIO_ACTUAL)
-        BANCO_ANIO_FOLDER_ID = get_or_last_folder(BANCO_FOLDER_ID, ANIO_ACTUAL)
-        BANCO_MES_FOLDER_ID = get_or_last_folder(BANCO_ANIO_FOLDER_ID, MES_NOMBRE)
+        with telemetria.etapa("carpetas"):
+            # Metadatos de Drive vistos en esta ejecución (no de la anterior)
+            drive.reset_metadata_cache()
+
+            BANCO_ANIO_FOLDER_ID = get_or_last_folder(BANCO_FOLDER_ID, ANIO_ACTUAL)
+            BANCO_MES_FOLDER_ID = get_or_last_folder(BANCO_ANIO_FOLDER_ID, MES_NOMBRE)
 
         # ==================================================
-        # CARGAR BANCO
+        # CAMBIOS DESDE LA ÚLTIMA EJECUCIÓN
         # ==================================================
-        print("🔄 Cargando banco desde Drive...")
-        banco, _ = cargar_banco_drive(
-            get_file_id_by_name=get_file_id_by_name,
-            read_excel_from_drive=read_excel_from_drive
-        )
-        print(f"📊 Banco cargado con {len(banco)} registros\n")
+        with telemetria.etapa("cambios"):
+            # El token se toma ANTES de leer: lo que se edite durante la
+            # ejecución se verá en la siguiente.
+            token_inicio = drive.get_start_page_token()
+            cambiados = None
+
+            if modo == "incremental":
+                token = leer_estado(ESTADO_INCREMENTAL_PATH).get("startPageToken")
+                if token:
+                    cambios, _ = drive.list_changes(token)
+                    cambiados = ids_cambiados(cambios)
+                    print(f"🔎 Archivos modificados desde la última ejecución: {len(cambiados)}")
+                else:
+                    print("⚠ Sin estado incremental previo: se hace una ejecución completa")
 
         # ==================================================
         # BUSCAR FICHAS
         # ==================================================
-        files_anio = []
-        areas = [
-            f for f in list_files_in_folder(FICHAS_FOLDER_ID)
-            if f.get("mimeType") == "application/vnd.google-apps.folder"
-        ]
-        print(f"📁 Áreas encontradas: {[a['name'] for a in areas]}")
-
-        for area in areas:
-            nombre_area = area["name"]
-            print(f"\n🔹 Leyendo área: {nombre_area}")
-            subfolders = [
-                f for f in list_files_in_folder(area["id"])
-                if f.get("mimeType") == "application/vnd.google-apps.folder"
-            ]
-            print(f"  📂 Subcarpetas: {[f['name'] for f in subfolders]}")
+        with telemetria.etapa("descubrimiento"):
+            if MODO_DESCUBRIMIENTO == "arbol":
+                files_anio, hijos = buscar_fichas_arbol(drive.list_files_in_folders, FICHAS_FOLDER_ID, ANIO_ACTUAL)
+                listar_fichas = lambda parent_id: hijos.get(parent_id, [])
+            else:
+                files_anio = buscar_fichas_por_carpetas(drive.list_folder_cached, FICHAS_FOLDER_ID, ANIO_ACTUAL)
+                listar_fichas = drive.list_folder_cached
 
-            carpeta_anio = next((f for f in subfolders if f["name"] == ANIO_ACTUAL), None)
-            if not carpeta_anio:
-                print(f"  ⚠ No existe carpeta para el año {ANIO_ACTUAL} en {nombre_area}")
-                continue
+            FICHAS_ANIO_FOLDER_ID = get_or_last_folder(FICHAS_FOLDER_ID, ANIO_ACTUAL, listar=listar_fichas)
 
-            archivos = [
-                f for f in list_files_in_folder(carpeta_anio["id"])
-                if f["name"].lower().endswith((".xlsx", ".xlsm"))
-            ]
-            print(f"  📄 Archivos encontrados: {[f['name'] for f in archivos]}")
+            if cambiados is not None:
+                fichas_cambiadas = filtrar_fichas_cambiadas(files_anio, cambiados)
+                banco_id = drive.get_file_id_by_name(BANCO_FOLDER_ID, BANCO_BASE_FILENAME)
 
-            for archivo in archivos:
-                files_anio.append({
-                    "id": archivo["id"],
-                    "name": archivo["name"],
-                    "area": nombre_area,
-                    "anio": ANIO_ACTUAL
-                })
+                if not fichas_cambiadas and MANUAL_FILE_ID not in cambiados and banco_id not in cambiados:
+                    guardar_estado(ESTADO_INCREMENTAL_PATH, token_inicio)
+                    print("\n✅ Sin cambios en fichas, archivo manual ni banco. Nada que hacer")
+                    return
 
-        print("\n📊 TOTAL GENERAL DE FICHAS:", len(files_anio))
+                # El banco publicado sale de TODAS las fichas: se siguen
+                # pasando todas y las que no cambiaron son hits de la cache
+                print(f"🔎 Fichas modificadas: {len(fichas_cambiadas)} (el resto desde la cache local)")
 
         # ==================================================
-        # PROCESAR FICHAS
+        # CARGAR BANCO
         # ==================================================
-        print("\n🔄 Procesando fichas...")
-        banco, registros = procesar_fichas_drive(
-            files_anio=files_anio,
-            banco=banco,
-            col_codigo=COL_CODIGO,
-            read_excel_from_drive=read_excel_from_drive,
-            clean_str=clean_str,
-            norm_code=norm_code
-        )
+        with telemetria.etapa("banco"):
+            # Tipos del archivo manual y de destinos de accesos directos,
+            # en un solo lote, para descargar sin consultar antes cada uno
+            drive.prefetch_metadata([MANUAL_FILE_ID] + drive.shortcut_targets(files_anio))
+
+            print("🔄 Cargando banco desde Drive...")
+            incidencias = []
+            banco, _ = cargar_banco_drive(
+                get_file_id_by_name=drive.get_file_id_by_name,
+                read_excel_from_drive=drive.read_excel_from_drive,
+                incidencias=incidencias,
+                get_file_metadata=drive.get_file_metadata,
+                snapshot=SnapshotBanco(SNAPSHOT_BANCO_PATH)
+            )
+            print(f"📊 Banco cargado con {len(banco)} registros\n")
+            if incidencias:
+                print(f"⚠ {len(incidencias)} problemas de validación en el banco (ver hoja Errores del reporte)")
+
+        print("\n📊 TOTAL GENERAL DE FICHAS A PROCESAR:", len(files_anio))
 
-        print("🔄 Cargando datos manuales...")
-        manual_df = cargar_datos_manuales(read_excel_from_drive)
-        banco = unir_datos_manuales(banco, manual_df)
-        for col in banco.columns:
-            banco[col] = banco[col].apply(lambda x: None if isinstance(x, str) and x.startswith("=") else x)
+        # ==================================================
+        # PROCESAR FICHAS
+        # ==================================================
+        with telemetria.etapa("fichas"):
+            print("\n🔄 Procesando fichas...")
+            banco_cargado = banco
+            presupuesto = PresupuestoBytes(DESCARGAS_EN_VUELO_MB * 1024 * 1024)
+            banco, registros = procesar_fichas_drive(
+                files_anio=files_anio,
+                banco=banco,
+                col_codigo=COL_CODIGO,
+                read_excel_from_drive=drive.read_excel_from_drive,
+                clean_str=clean_str,
+                norm_code=norm_code,
+                max_workers=MAX_WORKERS_DESCARGA,
+                cache=CacheFichas(CACHE_FICHAS_PATH, VERSION_EXTRACCION),
+                procesos=PROCESOS_PARSEO,
+                presupuesto=presupuesto
+            )
+            telemetria.registrar_presupuesto(presupuesto)
+
+            # 🔹 Incremental: no publicar menos filas que una ejecución completa
+            if modo == "incremental":
+                verificar_filas_banco(
+                    len(banco),
+                    filas_reconstruccion(banco_cargado, registros, COL_CODIGO),
+                    permitir=PERMITIR_BANCO_MENOR
+                )
+            registros = incidencias + registros
+
+        with telemetria.etapa("manual"):
+            print("🔄 Cargando datos manuales...")
+            manual_df = cargar_datos_manuales(drive.read_excel_from_drive)
+            banco = unir_datos_manuales(banco, manual_df)
+            # Sin fórmulas en ninguna celda de texto
+            banco, _ = normalizar(banco, formulas=list(banco.columns), nombre="banco")
 
         # ==================================================
         # GUARDAR
         # ==================================================
         print("\n💾 Guardando banco y reportes en Drive...")
-    # 🔹 El BASE se guarda en la carpeta del AÑO (no en el mes)
-        banco_base_id = get_file_id_by_name(BANCO_ANIO_FOLDER_ID, BANCO_BASE_FILENAME)
-
-        guardar_banco_con_estilos_drive(
-            banco=banco,
-            create_or_update_file=create_or_update_file,
-            banco_file_id=banco_base_id,
-            banco_folder_id=BANCO_ANIO_FOLDER_ID,
-            filename=BANCO_BASE_FILENAME
-        )
-
-
-        guardar_banco_con_estilos_drive(
-            banco=banco,
-            create_or_update_file=create_or_update_file,
-            banco_file_id=None,
-            banco_folder_id=BANCO_MES_FOLDER_ID,
-            filename=f"Banco_Indicadores_{FECHA_STR}.xlsx"
-        )
+        # 🔹 Se renderiza una sola vez y se publica en:
+        #    - BASE en la carpeta del AÑO (no en el mes)
+        #    - copia fechada del mes (se sobrescribe si ya se generó hoy)
+        with telemetria.etapa("estilos"):
+            banco_bytes = renderizar_banco_con_estilos(banco)
+
+        with telemetria.etapa("reportes"):
+            banco_mes_filename = f"Banco_Indicadores_{FECHA_STR}.xlsx"
+            tareas = [
+                {
+                    "bytes_data": banco_bytes,
+                    "file_id": drive.get_file_id_by_name(BANCO_ANIO_FOLDER_ID, BANCO_BASE_FILENAME),
+                    "filename": BANCO_BASE_FILENAME,
+                    "parent_folder_id": BANCO_ANIO_FOLDER_ID
+                },
+                {
+                    "bytes_data": banco_bytes,
+                    "file_id": drive.get_file_id_by_name(BANCO_MES_FOLDER_ID, banco_mes_filename),
+                    "filename": banco_mes_filename,
+                    "parent_folder_id": BANCO_MES_FOLDER_ID
+                },
+            ]
 
-        guardar_reportes_drive(
-            registros=registros,
-            get_file_id_by_name=get_file_id_by_name,
-            create_or_update_file=create_or_update_file,
-            reporte_folder_id=REPORTE_FOLDER_ID
-        )
+            # La hoja "Tiempos" llega hasta aquí: la subida se mide
+            # después y queda solo en el resumen JSON. El reporte se
+            # resube solo si cambia algo más que esa hoja
+            tareas += generar_reportes(
+                registros=registros,
+                get_file_id_by_name=drive.get_file_id_by_name,
+                reporte_folder_id=REPORTE_FOLDER_ID,
+                tiempos=telemetria.tabla_tiempos()
+            )
+
+        # 🔹 Subidas independientes en paralelo (con reintentos); las
+        #    que ya están en Drive con el mismo md5 se omiten
+        with telemetria.etapa("subida"):
+            publicar_archivos(
+                tareas,
+                drive.create_or_update_file,
+                max_workers=MAX_WORKERS_SUBIDA,
+                get_file_metadata=drive.get_file_metadata
+            )
+
+        guardar_estado(ESTADO_INCREMENTAL_PATH, token_inicio)
 
         print("\n🎉 Proceso finalizado correctamente")
         
@@ -213,6 +339,42 @@ def main():
         traceback.print_exc()
         raise
 
+    finally:
+        # También con errores o salida temprana: muestra dónde se fue el tiempo
+        if telemetria.resumen()["etapas"]:
+            telemetria.imprimir_resumen()
+            telemetria.guardar_resumen(RESUMEN_EJECUCION_PATH, {"modo": modo})
+
+# ======================================================
+# PRECARGA EN SEGUNDO PLANO
+# ======================================================
+hilo_precarga = None
+
+def precargar():
+    """
+    Importa los módulos pesados y deja listo el cliente de Drive
+    mientras el usuario ve la ventana.
+    """
+    inicio = time.perf_counter()
+    try:
+        for modulo in MODULOS_PESADOS:
+            importlib.import_module(modulo)
+
+        from components.backend_drive import cargar_backend
+        cargar_backend().precalentar()
+
+        print(f"🔥 Precarga lista en {time.perf_counter() - inicio:.2f}s")
+    except Exception as e:
+        # main() vuelve a intentarlo y muestra el error completo
+        print(f"⚠ Precarga incompleta: {e}")
+
+def iniciar_precarga():
+    global hilo_precarga
+    print(f"🪟 Ventana lista en {time.perf_counter() - INICIO_APP:.2f}s")
+    hilo_precarga = threading.Thread(target=precargar, daemon=True)
+    hilo_precarga.start()
+
+
 # ======================================================
 # SPINNER DE PUNTOS ANIMADOS
 # ======================================================
@@ -237,6 +399,11 @@ def ejecutar_proceso():
         spinner_running = True
         progress.start(10)
         update_spinner()
+
+        if hilo_precarga and hilo_precarga.is_alive():
+            print("⏳ Terminando precarga...")
+            hilo_precarga.join()
+
         main()
 
     except Exception:
@@ -262,11 +429,15 @@ def iniciar():
 # ======================================================
 if __name__ == "__main__":
 
-    # 🔹 Si se ejecuta con argumento "auto"
-    if len(sys.argv) > 1 and sys.argv[1] == "auto":
-        print("🤖 Ejecutando en modo automático (cron)...\n")
+    # Necesario para el pool de procesos en el ejecutable de PyInstaller
+    multiprocessing.freeze_support()
+
+    # 🔹 Si se ejecuta con argumento "auto" (completo) o "incremental"
+    if len(sys.argv) > 1 and sys.argv[1] in ("auto", "incremental"):
+        modo = "incremental" if sys.argv[1] == "incremental" else "completo"
+        print(f"🤖 Ejecutando en modo automático (cron, {modo})...\n")
         try:
-            main()
+            main(modo)
             print("\n✅ Proceso finalizado correctamente (modo automático)")
         except Exception as e:
             print("\n❌ Error en modo automático:")
@@ -292,4 +463,7 @@ if __name__ == "__main__":
 
     sys.stdout = RedirectText(log_text, sys.__stdout__)
 
+    # Precarga apenas la ventana quede pintada
+    ventana.after_idle(iniciar_precarga)
+
     ventana.mainloop()
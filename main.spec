@@ -1,12 +1,17 @@
 # -*- mode: python ; coding: utf-8 -*-
+from PyInstaller.utils.hooks import collect_data_files
 
 
 a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[],
-    hiddenimports=[],
+    # Documento de descubrimiento de Drive v3 (static_discovery, sin red)
+    # y tabla de reglas del Modelo de Atención
+    datas=collect_data_files('googleapiclient', includes=['discovery_cache/documents/drive.v3.json'])
+        + [('components/reglas_modelo_atencion.csv', 'components')],
+    # pyarrow: pandas lo importa solo al leer/escribir el snapshot Feather
+    hiddenimports=["drive_reader", "components.drive_local", "pyarrow", "pyarrow.feather"],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],